@@ -0,0 +1,83 @@
+"""
+Memory benchmark of the dataset loaders used by the data processors.
+
+Compares the peak resident memory of GeoSpatialDataset.load_from_path against the
+original loader, that read the whole file to hash it and kept a copy of the parsed
+frame. Each loader runs in a fresh process over the property assessment units by
+default. Run from the project root with:
+
+    PYTHONPATH=src python -m benchmarks.dataset_loading [file_path]
+"""
+import hashlib
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+import geopandas as gpd
+
+from data.types.geospatial_dataset import GeoSpatialDataset
+
+
+def load_from_path_legacy(local_path: str) -> tuple:
+    """
+    Reference implementation, hashing the file contents read at once.
+    """
+    with open(local_path, "rb") as j:
+        data = j.read()
+
+    gpd_hash = hashlib.md5(data).hexdigest()
+    gpd_data = gpd.read_file(local_path)
+
+    dataset = GeoSpatialDataset(data=gpd_data.copy(), ds_hash=gpd_hash)
+    return gpd_data, dataset
+
+
+def load_from_path(local_path: str) -> tuple:
+    dataset = GeoSpatialDataset()
+    gpd_data = dataset.load_from_path(local_path)
+    return gpd_data, dataset
+
+
+def _measure(loader, local_path: str, results: multiprocessing.Queue):
+    start = time.perf_counter()
+    loader(local_path)
+    elapsed = time.perf_counter() - start
+
+    # kilobytes on linux
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    results.put((elapsed, peak_rss))
+
+
+def get_default_path() -> str:
+    from config.settings import ProjectSettings
+    from utils.enums.databases import ExternalDatabases
+
+    settings = ProjectSettings()
+    dataset_settings = settings.databases[ExternalDatabases.PROPERTY_ASSESSMENT]
+    return dataset_settings.get_local_working_file_path()
+
+
+def run(local_path: str = None):
+    local_path = local_path or get_default_path()
+    file_size = os.path.getsize(local_path) / 1024**2
+    print(f"{local_path} ({file_size:0.1f} MB)")
+
+    context = multiprocessing.get_context("spawn")
+
+    for name, loader in [
+        ("legacy", load_from_path_legacy),
+        ("single pass", load_from_path),
+    ]:
+        results = context.Queue()
+        process = context.Process(target=_measure, args=(loader, local_path, results))
+        process.start()
+        elapsed, peak_rss = results.get()
+        process.join()
+
+        print(f"{name:>12}: {elapsed:8.2f}s | peak RSS {peak_rss:10.1f} MB")
+
+
+if __name__ == "__main__":
+    run(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,75 @@
+"""
+Benchmark of the geospatial reads of every configured data source.
+
+Compares, for each shapefile or GeoJSON source downloaded locally, the default
+reader against the arrow-based reader used by GeoSpatialDataset.read_file, with and
+without the Montréal agglomeration bounding box. Run from the project root with:
+
+    PYTHONPATH=src python -m benchmarks.geospatial_reads
+"""
+import os
+import time
+
+import geopandas as gpd
+
+from config.data_source_info import DataSourceInfo
+from config.settings import ProjectSettings
+from data.types.geospatial_dataset import ARROW_READS, GeoSpatialDataset
+from utils.constants import mtl_bounds
+from utils.enums.dataset_enums import DatasetEnums
+
+GEOSPATIAL_FORMATS = [DatasetEnums.SHP.value, DatasetEnums.GEOJSON.value]
+
+
+def get_sources(databases: dict) -> list:
+    """
+    Flatten the configured databases, nested by directory.
+    """
+    sources = []
+
+    for value in databases.values():
+        if isinstance(value, DataSourceInfo):
+            sources.append(value)
+        else:
+            sources.extend(get_sources(value))
+
+    return sources
+
+
+def run():
+    settings = ProjectSettings()
+    bbox = GeoSpatialDataset.to_bbox(mtl_bounds, crs="EPSG:4326")
+
+    if not ARROW_READS:
+        print("pyogrio/pyarrow not available, the arrow reader falls back to default")
+
+    for source in get_sources(settings.databases):
+        local_path = source.get_local_working_file_path()
+
+        if source.working_db_format not in GEOSPATIAL_FORMATS:
+            continue
+        if not os.path.exists(local_path):
+            print(f"{source.name}: ({local_path}) not downloaded, skipping")
+            continue
+
+        timings = {}
+        for name, reader in [
+            ("default", lambda: gpd.read_file(local_path)),
+            ("arrow", lambda: GeoSpatialDataset.read_file(local_path)),
+            ("arrow+bbox", lambda: GeoSpatialDataset.read_file(local_path, bbox=bbox)),
+        ]:
+            start = time.perf_counter()
+            data = reader()
+            timings[name] = (time.perf_counter() - start, len(data))
+
+        print(
+            f"{source.name}: "
+            + " | ".join(
+                f"{name} {elapsed:8.2f}s ({length} rows)"
+                for name, (elapsed, length) in timings.items()
+            )
+        )
+
+
+if __name__ == "__main__":
+    run()
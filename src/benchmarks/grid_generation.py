@@ -0,0 +1,88 @@
+"""
+Benchmark of the fishnet generation used by DataGrid.create_grid.
+
+Compares the vectorized fishnet against the original row by row loop over the
+Montréal agglomeration bounds. Run from the project root with:
+
+    PYTHONPATH=src python -m benchmarks.grid_generation
+"""
+import time
+
+import geopandas as gpd
+from haversine import inverse_haversine, Unit
+from shapely import geometry
+
+from data.prep.grid import DataGrid
+from utils.constants import mtl_bounds
+
+GRID_DISTANCES = [500, 100, 50]
+
+
+def create_fishnet_loop(
+    min_x: float, min_y: float, max_x: float, max_y: float, grid_size: float
+) -> gpd.GeoDataFrame:
+    """
+    Reference implementation, one polygon per loop iteration.
+    """
+    x, y = (min_x, min_y)
+    geom_array = []
+    row_id = 0
+
+    while y <= max_y:
+        col_id = 0
+
+        while x <= max_x:
+            geom = geometry.Polygon(
+                [
+                    (x, y),
+                    (x, y + grid_size),
+                    (x + grid_size, y + grid_size),
+                    (x + grid_size, y),
+                    (x, y),
+                ]
+            )
+            grid_name = "(" + str(row_id) + "," + str(col_id) + ")"
+            geom_array.append([geom, row_id, col_id, grid_name])
+            x += grid_size
+            col_id += 1
+
+        x = min_x
+        y += grid_size
+        row_id += 1
+
+    grid = gpd.GeoDataFrame(
+        geom_array, columns=["geometry", "grid_row_id", "grid_col_id", "grid_name"]
+    )
+    grid["grid_id"] = grid.index.tolist()
+
+    return grid
+
+
+def run(distances: list = None, units: Unit = Unit.METERS):
+    min_x, min_y, max_x, max_y = mtl_bounds
+
+    for distance in distances or GRID_DISTANCES:
+        end_pt = inverse_haversine(
+            point=(min_x, min_y), distance=distance, direction=0, unit=units
+        )
+        grid_size = end_pt[0] - min_x
+
+        timings = {}
+        for name, builder in [
+            ("loop", create_fishnet_loop),
+            ("vectorized", DataGrid.create_fishnet),
+        ]:
+            start = time.perf_counter()
+            grid = builder(min_x, min_y, max_x, max_y, grid_size)
+            timings[name] = time.perf_counter() - start
+
+        print(
+            f"{distance:>5} {units.value}: {len(grid):>9} cells | "
+            f"loop {timings['loop']:8.2f}s | "
+            f"vectorized {timings['vectorized']:8.2f}s | "
+            f"speedup x{timings['loop'] / timings['vectorized']:0.1f}"
+        )
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,107 @@
+"""
+Micro-benchmark of the property assessment aggregation by grid cell.
+
+Compares the single pass aggregation used by DatasetPropertyAssessment against the
+original one grouping pass per aggregated column, on a synthetic curated frame.
+Run from the project root with:
+
+    PYTHONPATH=src python -m benchmarks.property_aggregation
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from data.prep.property_assessment import AGGREGATIONS
+from utils.operations import aggregate_by
+
+N_ROWS = 1_000_000
+N_CELLS = 5_000
+YEAR_CATEGORIES = [
+    "ANNEE_CONSTR_1900",
+    "ANNEE_CONSTR_1900-1920",
+    "ANNEE_CONSTR_1920-1940",
+    "ANNEE_CONSTR_1940-1960",
+    "ANNEE_CONSTR_1960-1980",
+    "ANNEE_CONSTR_1980-2000",
+    "ANNEE_CONSTR_2000-2020",
+    "ANNEE_CONSTR_2020-2023",
+    "ANNEE_CONSTR_2023",
+]
+
+
+def create_curated_data(n_rows: int = N_ROWS, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    is_logement = rng.random(n_rows) < 0.6
+    is_condominium = is_logement & (rng.random(n_rows) < 0.3)
+    is_outside = ~is_logement & (rng.random(n_rows) < 0.2)
+
+    return pd.DataFrame(
+        {
+            "grid_id": rng.integers(0, N_CELLS, n_rows),
+            "ID_UEV": rng.integers(0, n_rows // 2, n_rows),
+            "ETAGE_HORS": rng.integers(1, 10, n_rows),
+            "NOMBRE_LOG": rng.integers(0, 20, n_rows),
+            "SUPERFICIE": rng.random(n_rows) * 1000,
+            "SUPERFIC_1": rng.random(n_rows) * 500,
+            "ANNEE_CONS_CATEGORY": pd.Categorical.from_codes(
+                rng.integers(0, len(YEAR_CATEGORIES), n_rows), YEAR_CATEGORIES
+            ),
+            "IS_CONDOMINIUMS": is_condominium,
+            "IS_LOGEMENT": is_logement & ~is_condominium,
+            "IS_OUTSIDE": is_outside,
+            "IS_MIXED": ~is_logement & ~is_outside,
+        }
+    )
+
+
+def aggregate_loop(curated_data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Reference implementation, one groupby per aggregated column.
+    """
+    aggregated_data = (
+        curated_data.groupby(["grid_id", "ANNEE_CONS_CATEGORY"], observed=False)
+        .size()
+        .unstack(fill_value=0)
+    )
+
+    for output, (column, reducer) in AGGREGATIONS.items():
+        aggregated_data[output] = curated_data.groupby("grid_id")[column].agg(reducer)
+
+    return aggregated_data.reset_index()
+
+
+def run(n_rows: int = N_ROWS):
+    curated_data = create_curated_data(n_rows)
+
+    results, timings = {}, {}
+    for name, aggregate in [
+        ("loop", aggregate_loop),
+        (
+            "single pass",
+            lambda data: aggregate_by(
+                data,
+                by="grid_id",
+                aggregations=AGGREGATIONS,
+                one_hot=["ANNEE_CONS_CATEGORY"],
+            ),
+        ),
+    ]:
+        start = time.perf_counter()
+        results[name] = aggregate(curated_data)
+        timings[name] = time.perf_counter() - start
+
+    is_equal = np.allclose(
+        results["loop"].to_numpy(dtype=float),
+        results["single pass"].to_numpy(dtype=float),
+    )
+    print(
+        f"{n_rows} rows: loop {timings['loop']:6.2f}s | "
+        f"single pass {timings['single pass']:6.2f}s | "
+        f"speedup x{timings['loop'] / timings['single pass']:0.1f} | "
+        f"same results: {is_equal}"
+    )
+
+
+if __name__ == "__main__":
+    run()
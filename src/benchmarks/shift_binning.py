@@ -0,0 +1,63 @@
+"""
+Micro-benchmark of the shift categorization of the fire incidents.
+
+Compares the vectorized times_to_categories used by DatasetFireIncidents against
+the original time_to_category mapped on every time of day, and asserts that both
+agree on synthetic dates, including the shift boundaries and midnight. Run from the
+project root with:
+
+    PYTHONPATH=src python -m benchmarks.shift_binning
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.conversions import SHIFT_BOUNDARIES, time_to_category, times_to_categories
+
+N_ROWS = 1_000_000
+
+
+def create_dates(n_rows: int = N_ROWS, seed: int = 0) -> pd.Series:
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2015-01-01")
+
+    # random dates, plus every boundary and the instants around it
+    dates = start + pd.to_timedelta(
+        rng.integers(0, 9 * 365 * 86_400_000_000, n_rows), unit="us"
+    )
+    edges = [start, start + pd.Timedelta("1us")] + [
+        start + pd.Timedelta(hours=b.hour, minutes=b.minute) + pd.Timedelta(delta)
+        for b in SHIFT_BOUNDARIES
+        for delta in ["-1us", "0us", "1us"]
+    ]
+
+    return pd.Series(dates.append(pd.DatetimeIndex(edges)), name="CREATION_D")
+
+
+def run(n_rows: int = N_ROWS):
+    dates = create_dates(n_rows)
+
+    results, timings = {}, {}
+    for name, categorize in [
+        ("map", lambda data: data.dt.time.map(time_to_category)),
+        ("vectorized", times_to_categories),
+    ]:
+        start = time.perf_counter()
+        results[name] = categorize(dates)
+        timings[name] = time.perf_counter() - start
+
+    # a regression in the bin edges or around midnight must fail loudly
+    pd.testing.assert_series_equal(
+        results["vectorized"].astype(results["map"].dtype), results["map"]
+    )
+    print(
+        f"{len(dates)} dates: map {timings['map']:6.2f}s | "
+        f"vectorized {timings['vectorized']:6.2f}s | "
+        f"speedup x{timings['map'] / timings['vectorized']:0.1f} | "
+        "same results: True"
+    )
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,205 @@
+"""
+Check of the incremental refresh of the tax rolls.
+
+Runs DatasetTaxRoll incrementally on synthetic borough tax rolls through a sequence
+of changes (a borough edited, a borough removed from the configuration along with a
+tax year change, a borough left without any tax kept, nothing changed), and asserts
+after each run that the transformed borough partitions, read back with load_boroughs,
+and the aggregated tax rolls match a clean full recompute. Run from the project root
+with:
+
+    PYTHONPATH=src python -m benchmarks.tax_roll_refresh
+"""
+import os
+import shutil
+import tempfile
+import time
+from enum import Enum
+
+import numpy as np
+import pandas as pd
+from haversine import Unit
+
+from config.data_source_info import DataSourceInfo
+from data.prep.tax_rolls import BOROUGH_COLUMN, DatasetTaxRoll
+from utils.enums.intermediate_storages import IntermediateStorage
+from utils.enums.states import StateMachineStates
+
+N_UNITS = 20_000
+N_CELLS = 500
+N_ROWS = 50_000
+PROPERTY_ASSESSMENT = "property-assessment"
+PROCESSED_FILE_PATH = "{dataset_name}_{grid_distance}{grid_units}.parquet"
+
+
+def create_property_assessment(root_dir: str, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    filepath = os.path.join(
+        root_dir,
+        StateMachineStates.STATE_TRANSFORMATION.value,
+        PROCESSED_FILE_PATH.format(
+            dataset_name=PROPERTY_ASSESSMENT, grid_distance=500, grid_units="m"
+        ),
+    )
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+
+    pd.DataFrame(
+        {
+            "ID_UEV": np.arange(N_UNITS),
+            "grid_id": rng.integers(0, N_CELLS, N_UNITS),
+        }
+    ).to_parquet(filepath, index=False)
+
+
+def create_tax_roll(
+    filepath: str, seed: int, tax_years: list = (2022, 2023), n_rows: int = N_ROWS
+):
+    rng = np.random.default_rng(seed)
+    data = {
+        column: ""
+        for column in DatasetTaxRoll.source_columns
+        if column.startswith("AD_")
+    }
+
+    pd.DataFrame(
+        {
+            "ANNEE_EXERCICE": rng.choice(tax_years, n_rows),
+            "ID_CUM": rng.integers(0, N_UNITS, n_rows),
+            **data,
+            "CODE_DESCR_LONGUE": rng.choice(["E00", "E01"], n_rows),
+            "DESCR_LONGUE": "taxe",
+            "VAL_IMPOSABLE": rng.integers(10_000, 1_000_000, n_rows).astype(float),
+        }
+    ).to_csv(filepath, index=False)
+
+
+def aggregate(
+    root_dir: str, input_dir: str, boroughs: list, tax_year: int, incremental: bool
+) -> DatasetTaxRoll:
+    """
+    Run the tax rolls processor, as the state machine does, and return it.
+    """
+    borough_enum = Enum("Borough", {borough: borough for borough in boroughs})
+    dataset = DatasetTaxRoll(
+        dataset_settings={
+            borough: DataSourceInfo(
+                name=borough.value,
+                url="",
+                directory=input_dir,
+                preferred_format="csv",
+                remote_files={"csv": f"{borough.value}.csv"},
+            )
+            for borough in borough_enum
+        },
+        grid_distance=500,
+        grid_units=Unit.METERS,
+        grid_generic_filepath="",
+        processed_root_dir=root_dir,
+        processed_sub_dir=StateMachineStates.STATE_TRANSFORMATION.value,
+        processed_file_path=PROCESSED_FILE_PATH,
+        processed_file_name=PROPERTY_ASSESSMENT,
+        tax_year=tax_year,
+        max_workers=1,
+        intermediate_storage=(
+            IntermediateStorage.PARTITIONED
+            if incremental
+            else IntermediateStorage.MEMORY
+        ),
+        incremental=incremental,
+    )
+
+    for state, step in [
+        (StateMachineStates.STATE_LOADING, dataset.data_load),
+        (StateMachineStates.STATE_TRANSFORMATION, dataset.data_transform),
+        (StateMachineStates.STATE_AGGREGATION, dataset.data_aggregate),
+    ]:
+        dataset.working_dir = state.value
+        os.makedirs(dataset.working_dir, exist_ok=True)
+        step()
+
+    return dataset
+
+
+def sort_rows(data: pd.DataFrame) -> pd.DataFrame:
+    return data.sort_values(list(data.columns)).reset_index(drop=True)
+
+
+def run():
+    input_dir = tempfile.mkdtemp()
+    incremental_dir, clean_dir = tempfile.mkdtemp(), tempfile.mkdtemp()
+
+    try:
+        for borough in ["b0", "b1", "b2", "b3"]:
+            create_tax_roll(
+                os.path.join(input_dir, f"{borough}.csv"), seed=int(borough[1])
+            )
+
+        def edit_borough():
+            create_tax_roll(os.path.join(input_dir, "b1.csv"), seed=10)
+
+        def empty_borough():
+            create_tax_roll(os.path.join(input_dir, "b2.csv"), seed=2, tax_years=[2021])
+
+        steps = [
+            ("first run", None, ["b0", "b1", "b2", "b3"], 2023),
+            ("borough edited", edit_borough, ["b0", "b1", "b2", "b3"], 2023),
+            ("borough removed, tax year changed", None, ["b0", "b1", "b2"], 2022),
+            ("borough without taxes kept", empty_borough, ["b0", "b1", "b2"], 2022),
+            ("nothing changed", None, ["b0", "b1", "b2"], 2022),
+        ]
+
+        for name, change, boroughs, tax_year in steps:
+            if change:
+                change()
+
+            timings = {}
+            for is_incremental, root_dir in [
+                (True, incremental_dir),
+                (False, clean_dir),
+            ]:
+                # the clean run always starts from the property assessment alone
+                if not is_incremental:
+                    shutil.rmtree(root_dir)
+                create_property_assessment(root_dir)
+
+                start = time.perf_counter()
+                dataset = aggregate(
+                    root_dir, input_dir, boroughs, tax_year, incremental=is_incremental
+                )
+                timings[is_incremental] = (time.perf_counter() - start, dataset)
+
+            (incremental_time, incremental), (clean_time, clean) = (
+                timings[True],
+                timings[False],
+            )
+
+            # the refresh only reads back the partitions of the changed boroughs
+            if incremental.changed_boroughs:
+                changed_data = incremental.load_boroughs(
+                    sorted(incremental.changed_boroughs)
+                )
+                assert set(changed_data[BOROUGH_COLUMN]) <= incremental.changed_boroughs
+
+            # the partitions hold the tax rolls of the configured boroughs only
+            clean_data = clean.curated_dataset.data
+            pd.testing.assert_frame_equal(
+                sort_rows(incremental.load_boroughs()[list(clean_data.columns)]),
+                sort_rows(clean_data),
+                check_dtype=False,
+            )
+            pd.testing.assert_frame_equal(
+                sort_rows(incremental.aggregated_dataset.data),
+                sort_rows(clean.aggregated_dataset.data),
+                check_dtype=False,
+            )
+            print(
+                f"{name:>34}: incremental {incremental_time:6.2f}s | "
+                f"clean {clean_time:6.2f}s | same results: True"
+            )
+    finally:
+        for directory in [input_dir, incremental_dir, clean_dir]:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    run()
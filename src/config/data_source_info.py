@@ -1,7 +1,8 @@
 import json
-from typing import Dict
+from typing import Dict, List, Union
 
 from utils.custom_file_io import override_local_paths
+from utils.enums.validation_policies import ValidationPolicy
 
 
 class DataSourceInfo:
@@ -13,6 +14,7 @@ class DataSourceInfo:
         description: str = None,
         preferred_format: str = None,
         remote_files: Dict[str, str] = None,
+        validation_policy: Union[str, List[str]] = ValidationPolicy.WORKING_FORMAT,
     ):
         """
         Initialize a DataSourceInfo object.
@@ -24,6 +26,8 @@ class DataSourceInfo:
             description (str, optional): The description of the data source. Defaults to None.
             preferred_format (str, optional): The preferred format of the data source. Defaults to None.
             remote_files (Dict[str, str], optional): Dictionary of remote file paths. Defaults to None.
+            validation_policy (Union[str, List[str]], optional): The remote formats to validate, either
+                'working_format', 'all' or an explicit list of formats. Defaults to 'working_format'.
         """
         self.name = name
         self.description = description
@@ -31,6 +35,7 @@ class DataSourceInfo:
         self.directory = directory
         self.working_db_format: str = preferred_format
         self.remote: Dict[str, str] = remote_files
+        self.validation_policy: Union[str, List[str]] = validation_policy
 
     def __iter__(self):
         """
@@ -42,6 +47,7 @@ class DataSourceInfo:
             "url": self.url,
             "directory": self.directory,
             "working_db_format": self.working_db_format,
+            "validation_policy": self.validation_policy,
             "remote": self.remote,
         }.items()
 
@@ -76,6 +82,7 @@ class DataSourceInfo:
             "url": self.url,
             "directory": self.directory,
             "working_db_format": self.working_db_format,
+            "validation_policy": self.validation_policy,
             "remote": self.remote,
         }
 
@@ -95,6 +102,7 @@ class DataSourceInfo:
 
         name, url, directory, description = None, None, None, None
         working_db_format, local_files, remote_files = None, None, None
+        validation_policy = ValidationPolicy.WORKING_FORMAT
 
         if "name" in dictionary:
             name = dictionary["name"]
@@ -106,6 +114,8 @@ class DataSourceInfo:
             directory = dictionary["directory"]
         if "working_db_format" in dictionary:
             working_db_format = dictionary["working_db_format"]
+        if "validation_policy" in dictionary:
+            validation_policy = dictionary["validation_policy"]
         if "remote" in dictionary:
             remote_files = cls.parse_dict(dictionary["remote"])
 
@@ -116,6 +126,7 @@ class DataSourceInfo:
             directory=directory,
             preferred_format=working_db_format,
             remote_files=remote_files,
+            validation_policy=validation_policy,
         )
 
         return df_source_info
@@ -167,3 +178,39 @@ class DataSourceInfo:
         """
         local_paths = self.get_db_local_paths()
         return local_paths[self.working_db_format]
+
+    def get_remote_files_to_validate(self) -> Dict[str, str]:
+        """
+        Get the remote files to validate, according to the validation policy.
+
+        Returns:
+            Dict[str, str]: A dictionary mapping file formats to their remote file paths.
+
+        Raises:
+            ValueError: If the validation policy is not valid, or lists file formats
+                that are not remote files of the source.
+        """
+        if self.validation_policy == ValidationPolicy.ALL:
+            file_formats = list(self.remote.keys())
+        elif self.validation_policy == ValidationPolicy.WORKING_FORMAT:
+            file_formats = [self.working_db_format]
+        elif isinstance(self.validation_policy, list):
+            file_formats = self.validation_policy
+            unknown_formats = [
+                file_format
+                for file_format in file_formats
+                if file_format not in self.remote
+            ]
+            if unknown_formats:
+                raise ValueError(
+                    f"Validation policy of ({self.name}) lists unknown file formats "
+                    f"{unknown_formats}, expected some of {list(self.remote.keys())}!"
+                )
+        else:
+            raise ValueError(
+                f"Validation policy '{self.validation_policy}' of ({self.name}) is not valid!"
+            )
+
+        return {
+            file_format: self.remote.get(file_format) for file_format in file_formats
+        }
@@ -9,6 +9,8 @@ from config import logs
 from config.data_source_info import DataSourceInfo
 from utils.custom_file_io import get_absolute_path
 from utils.enums.databases import ExternalDatabases
+from utils.enums.intermediate_storages import IntermediateStorage
+from utils.enums.temporal_resolutions import TemporalResolution
 
 logger = logs.get_logger(__name__)
 
@@ -85,7 +87,9 @@ class ProjectSettings(object):
             # ----------------------------------------------------------------------------------------------------------
             cls.out_dir = "./out"
             cls.processed_root_dir = "resources/data/processed/"
-            cls.processed_file_path = "{dataset_name}_{grid_distance}_{grid_units}.csv"
+            cls.processed_file_path = (
+                "{dataset_name}_{grid_distance}_{grid_units}.parquet"
+            )
 
             # ----------------------------------------------------------------------------------------------------------
             # other parameters
@@ -99,6 +103,19 @@ class ProjectSettings(object):
             )
             cls.grid_distance = 500
             cls.grid_units = Unit.METERS
+            cls.grid_plot_diagnostics = False
+            cls.grid_plot_max_cells = 20000
+            cls.grid_cache_max_entries = 4
+            cls.tax_roll_year = 2023
+            cls.tax_roll_code = "E00"
+            cls.tax_roll_chunk_size = 100000
+            cls.tax_roll_max_workers = os.cpu_count()
+            cls.tax_roll_intermediate_storage = IntermediateStorage.PARTITIONED
+            cls.tax_roll_incremental = True
+            cls.temporal_resolution = TemporalResolution.QUARTER
+            cls.fire_keep_unknown_groups = False
+            cls.fire_monthly_counts = False
+            cls.fire_shift_counts = False
             # ----------------------------------------------------------------------------------------------------------
             # initialization timing
             # ----------------------------------------------------------------------------------------------------------
@@ -0,0 +1,129 @@
+import glob
+import hashlib
+import json
+import os
+import time
+
+from config.logs import get_logger
+from data.types.grid_manifest import GridManifest
+
+MANIFEST_SUFFIX = ".manifest.json"
+logger = get_logger(__name__)
+
+
+class GridCache:
+    """
+    Content-addressed cache of the generated grids.
+
+    Each grid artifact has a manifest stored next to it, holding the key it was
+    generated with. An artifact is reused only if its manifest key matches the
+    requested one, and only the `max_entries` most recently used artifacts of a
+    directory are kept on disk.
+    """
+
+    def __init__(self, max_entries: int = 4):
+        """
+        Initialize the GridCache.
+
+        Args:
+            max_entries: Number of grid artifacts kept per directory (default: 4).
+        """
+        self.max_entries = max_entries
+
+    @staticmethod
+    def get_key(
+        first_layer_hash: str,
+        second_layer_hash: str,
+        distance: float,
+        units: str,
+        expand_data: bool,
+    ) -> str:
+        """
+        Compute the cache key of a grid.
+
+        Args:
+            first_layer_hash: Hash of the first layer file.
+            second_layer_hash: Hash of the second layer file.
+            distance: Grid measure.
+            units: Grid measure units.
+            expand_data: Whether the grid row, column and name are kept.
+
+        Returns:
+            The md5 of the grid inputs.
+        """
+        key_content = json.dumps(
+            [first_layer_hash, second_layer_hash, distance, units, expand_data]
+        )
+        return hashlib.md5(key_content.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def get_manifest_path(artifact_path: str) -> str:
+        return os.path.splitext(artifact_path)[0] + MANIFEST_SUFFIX
+
+    def get(self, artifact_path: str, cache_key: str) -> bool:
+        """
+        Look up an artifact in the cache, refreshing its last use on a hit.
+
+        Args:
+            artifact_path: Path of the grid artifact.
+            cache_key: Expected key of the grid.
+
+        Returns:
+            True if the artifact exists and was generated with the same key, False otherwise.
+        """
+        manifest_path = self.get_manifest_path(artifact_path)
+
+        if not os.path.exists(artifact_path) or not os.path.exists(manifest_path):
+            logger.debug(f"Grid ({artifact_path}) is not cached...")
+            return False
+
+        manifest = GridManifest.from_json_path(manifest_path)
+        if manifest.cache_key != cache_key:
+            logger.info(
+                f"Grid ({artifact_path}) is stale, layers or parameters changed"
+            )
+            return False
+
+        manifest.last_used_at = time.time()
+        manifest.save_data(manifest_path)
+
+        return True
+
+    def put(self, artifact_path: str, manifest: GridManifest):
+        """
+        Register an artifact in the cache and evict the least recently used ones.
+
+        Args:
+            artifact_path: Path of the grid artifact.
+            manifest: Manifest describing the artifact.
+        """
+        manifest.created_at = manifest.last_used_at = time.time()
+        manifest.save_data(self.get_manifest_path(artifact_path))
+
+        self.evict(os.path.dirname(artifact_path))
+
+    def evict(self, directory: str):
+        """
+        Remove the least recently used artifacts above the cache capacity.
+
+        Args:
+            directory: Directory holding the grid artifacts.
+        """
+        manifests = [
+            (
+                GridManifest.from_json_path(manifest_path).last_used_at or 0,
+                manifest_path,
+            )
+            for manifest_path in glob.glob(
+                os.path.join(directory, "*" + MANIFEST_SUFFIX)
+            )
+        ]
+        manifests.sort(reverse=True)
+
+        for _, manifest_path in manifests[self.max_entries :]:
+            artifact_prefix = manifest_path[: -len(MANIFEST_SUFFIX)] + "."
+            logger.info(f"Evicting grid ({artifact_prefix}*) from cache...")
+
+            # shapefiles come with sidecar files sharing the same name
+            for file_path in glob.glob(glob.escape(artifact_prefix) + "*"):
+                os.remove(file_path)
@@ -0,0 +1,173 @@
+import json
+import os
+import tempfile
+import threading
+from typing import Dict, Optional
+
+from config.logs import get_logger
+
+METADATA_FILE_NAME = ".remote_metadata.json"
+logger = get_logger(__name__)
+
+# files of multiple sources can be validated concurrently in the same directory
+_store_lock = threading.Lock()
+
+
+class RemoteMetadataStore:
+    """
+    Store of the HTTP validators (ETag, Last-Modified, Content-Length) of the remote
+    files downloaded into a directory, keyed by remote URL. The validators of an
+    interrupted download are kept apart so that it can be resumed.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Initialize the RemoteMetadataStore.
+
+        Args:
+            directory: Directory where the remote files are downloaded.
+        """
+        self.file_path = os.path.join(directory, METADATA_FILE_NAME)
+
+    def _read(self) -> Dict[str, dict]:
+        if not os.path.exists(self.file_path):
+            return {}
+
+        try:
+            with open(self.file_path, "r") as file:
+                return json.load(file)
+        except json.JSONDecodeError:
+            logger.warning(f"Ignoring invalid metadata file ({self.file_path})...")
+            return {}
+
+    def get(self, remote_url: str) -> Optional[dict]:
+        """
+        Get the metadata of a remote file.
+
+        Args:
+            remote_url: Remote URL of the file.
+
+        Returns:
+            The stored metadata, None if the file was never downloaded.
+        """
+        with _store_lock:
+            return self._read().get(remote_url)
+
+    def get_partial(self, remote_url: str) -> Optional[dict]:
+        """
+        Get the metadata of the partial download of a remote file.
+
+        Args:
+            remote_url: Remote URL of the file.
+
+        Returns:
+            The stored metadata, None if no download is in progress.
+        """
+        return (self.get(remote_url) or {}).get("partial")
+
+    def put(self, remote_url: str, metadata: dict):
+        """
+        Store the metadata of a remote file, once it is completely downloaded.
+
+        Args:
+            remote_url: Remote URL of the file.
+            metadata: Metadata to store.
+        """
+        with _store_lock:
+            all_metadata = self._read()
+            all_metadata[remote_url] = metadata
+            self._write(all_metadata)
+
+    def put_partial(self, remote_url: str, metadata: dict):
+        """
+        Store the metadata of the partial download of a remote file.
+
+        Args:
+            remote_url: Remote URL of the file.
+            metadata: Metadata of the response being downloaded.
+        """
+        with _store_lock:
+            all_metadata = self._read()
+            all_metadata.setdefault(remote_url, {})["partial"] = metadata
+            self._write(all_metadata)
+
+    def _write(self, all_metadata: Dict[str, dict]):
+        directory = os.path.dirname(self.file_path)
+        os.makedirs(directory, exist_ok=True)
+
+        # readers only ever see the previous or the new file, never a partial one
+        file_descriptor, temp_path = tempfile.mkstemp(
+            dir=directory, prefix=METADATA_FILE_NAME, suffix=".tmp"
+        )
+        try:
+            with os.fdopen(file_descriptor, "w") as file:
+                json.dump(all_metadata, file, indent=4)
+            os.replace(temp_path, self.file_path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    @staticmethod
+    def from_headers(headers) -> dict:
+        """
+        Extract the validators of an HTTP response.
+
+        Args:
+            headers: Headers of the HTTP response.
+
+        Returns:
+            The validators of the response.
+        """
+        return {
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "content_length": headers.get("Content-Length"),
+        }
+
+    @staticmethod
+    def to_conditional_headers(metadata: Optional[dict]) -> dict:
+        """
+        Build the conditional request headers from the stored metadata.
+
+        Args:
+            metadata: The stored metadata of the remote file.
+
+        Returns:
+            The conditional request headers, empty if nothing is stored.
+        """
+        headers = {}
+
+        if metadata:
+            if metadata.get("etag"):
+                headers["If-None-Match"] = metadata["etag"]
+            if metadata.get("last_modified"):
+                headers["If-Modified-Since"] = metadata["last_modified"]
+
+        return headers
+
+    @staticmethod
+    def to_range_headers(metadata: Optional[dict], offset: int) -> dict:
+        """
+        Build the headers requesting the rest of a partial download.
+
+        Args:
+            metadata: The stored metadata of the partial download.
+            offset: Number of bytes already downloaded.
+
+        Returns:
+            The range request headers, empty if the download cannot be resumed.
+        """
+        validator = None
+
+        if metadata:
+            # weak entity tags cannot be used to resume a download
+            etag = metadata.get("etag")
+            if etag and etag.startswith("W/"):
+                etag = None
+            validator = etag or metadata.get("last_modified")
+
+        # without a validator, the bytes on disk could belong to an older version
+        if not validator or offset <= 0:
+            return {}
+
+        return {"Range": f"bytes={offset}-", "If-Range": validator}
@@ -16,6 +16,9 @@ grid_dataset = DataGrid(
     second_layer_db_settings=settings.databases[ExternalDatabases.CENSUS_2021],
     grid_distance=settings.grid_distance,
     grid_units=settings.grid_units,
+    plot_diagnostics=settings.grid_plot_diagnostics,
+    plot_max_cells=settings.grid_plot_max_cells,
+    cache_max_entries=settings.grid_cache_max_entries,
 )
 
 tax_roll_dataset = DatasetTaxRoll(
@@ -27,6 +30,12 @@ tax_roll_dataset = DatasetTaxRoll(
     processed_file_name=settings.databases[ExternalDatabases.PROPERTY_ASSESSMENT].name,
     grid_distance=settings.grid_distance,
     grid_units=settings.grid_units,
+    tax_year=settings.tax_roll_year,
+    tax_code=settings.tax_roll_code,
+    chunk_size=settings.tax_roll_chunk_size,
+    max_workers=settings.tax_roll_max_workers,
+    intermediate_storage=settings.tax_roll_intermediate_storage,
+    incremental=settings.tax_roll_incremental,
 )
 
 property_assessment_dataset = DatasetPropertyAssessment(
@@ -45,6 +54,7 @@ crime_dataset = DatasetCrime(
     processed_file_path=settings.processed_file_path,
     grid_distance=settings.grid_distance,
     grid_units=settings.grid_units,
+    temporal_resolution=settings.temporal_resolution,
 )
 
 fire_incidents_dataset = DatasetFireIncidents(
@@ -54,6 +64,10 @@ fire_incidents_dataset = DatasetFireIncidents(
     processed_file_path=settings.processed_file_path,
     grid_distance=settings.grid_distance,
     grid_units=settings.grid_units,
+    keep_unknown_groups=settings.fire_keep_unknown_groups,
+    monthly_counts=settings.fire_monthly_counts,
+    shift_counts=settings.fire_shift_counts,
+    temporal_resolution=settings.temporal_resolution,
 )
 
 
@@ -1,27 +1,62 @@
 import datetime
 import os
-import urllib
+import urllib.error
+import urllib.parse
+import urllib.request
+import threading
 import os.path
 import hashlib
 import os.path as path
 import time
 from abc import ABC, abstractmethod
-from typing import List
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from http import HTTPStatus
+from typing import BinaryIO, Dict, List, Optional
 
+import geopandas as gpd
+import numpy as np
+import pandas as pd
 from haversine import Unit
 
 from config.data_source_info import DataSourceInfo
 from config.logs import get_logger
+from data.cache.remote_metadata import RemoteMetadataStore
+from data.types.geospatial_dataset import GeoSpatialDataset
+from data.types.grid_index import GridIndex
+from utils.custom_file_io import CHUNK_SIZE, get_file_hash
+from utils.enums.temporal_resolutions import TemporalResolution
 from utils.exceptions import InvalidOperation
 
+MAX_DOWNLOAD_WORKERS = 8
+MAX_DOWNLOADS_PER_HOST = 4
+MAX_DOWNLOAD_RETRIES = 3
+DOWNLOAD_RETRY_BACKOFF = 2
+RETRY_HTTP_CODES = [HTTPStatus.REQUEST_TIMEOUT, HTTPStatus.TOO_MANY_REQUESTS]
+# columns identifying the period of a date, by temporal resolution
+TEMPORAL_KEYS = {
+    TemporalResolution.DAY: ["DATE"],
+    TemporalResolution.WEEK: ["WEEK"],
+    TemporalResolution.MONTH: ["YEAR", "MONTH"],
+    TemporalResolution.QUARTER: ["YEAR", "QUARTER"],
+    TemporalResolution.YEAR: ["YEAR"],
+}
 logger = get_logger(__name__)
 
 
 class DataProcessor(ABC):
     """
     Abstract base class for data processing.
+
+    Attributes:
+        source_columns: Columns read from the source file, all of them if None.
+        source_dtypes: Dtypes of the source columns, inferred if None.
+        schema: Compact dtypes of the processed columns, applied by apply_schema.
     """
 
+    source_columns: Optional[List[str]] = None
+    source_dtypes: Optional[Dict[str, type]] = None
+    schema: Optional[Dict[str, str]] = None
+
     def __init__(
         self,
         grid_distance: int,
@@ -29,12 +64,14 @@ class DataProcessor(ABC):
         grid_generic_filepath: str,
         processed_root_dir: str = None,
         processed_file_path: str = None,
+        temporal_resolution: TemporalResolution = TemporalResolution.QUARTER,
     ):
         """
         Initialize the DataProcessor.
 
         Args:
             .
+            temporal_resolution: Periods of the aggregated data (default: QUARTER).
         """
         self.root_dir: str = processed_root_dir
         self._working_dir: str = processed_root_dir
@@ -42,12 +79,17 @@ class DataProcessor(ABC):
         self.grid_distance = grid_distance
         self.grid_units = grid_units
         self.grid_generic_filepath = grid_generic_filepath
+        self.temporal_resolution = TemporalResolution(temporal_resolution)
 
     @property
     @abstractmethod
     def dataset_name(self):
         pass
 
+    @property
+    def temporal_keys(self) -> List[str]:
+        return TEMPORAL_KEYS[self.temporal_resolution]
+
     @property
     def working_dir(self):
         return self._working_dir
@@ -75,6 +117,128 @@ class DataProcessor(ABC):
             distance=str(self.grid_distance), units=str(self.grid_units.value)
         )
 
+    @property
+    def grid_index_local_path(self):
+        return os.path.splitext(self.grid_local_path)[0] + ".index.npz"
+
+    def load_source(self, dataset, local_path: str):
+        """
+        Load a source file, reading only the declared columns with their dtypes.
+
+        Args:
+            dataset: GeoSpatialDataset or TabularDataset receiving the data.
+            local_path: Local path of the source file.
+
+        Returns:
+            The loaded data.
+        """
+        return dataset.load_from_path(
+            local_path, columns=self.source_columns, dtype=self.source_dtypes
+        )
+
+    def get_temporal_buckets(self, dates: pd.Series) -> pd.DataFrame:
+        """
+        Bucket the dates by period, at the temporal resolution of the processor.
+
+        Args:
+            dates: Dates to bucket.
+
+        Returns:
+            The temporal keys of the period of each date, aligned on the dates. Days
+            and weeks are identified by their first day, the others by their
+            calendar parts.
+        """
+        accessor = dates.dt
+        buckets = {
+            "DATE": lambda: accessor.normalize(),
+            "WEEK": lambda: accessor.normalize()
+            - pd.to_timedelta(accessor.dayofweek, unit="D"),
+            "YEAR": lambda: accessor.year.astype("int16"),
+            "QUARTER": lambda: accessor.quarter.astype("int8"),
+            "MONTH": lambda: accessor.month.astype("int8"),
+        }
+
+        return pd.DataFrame(
+            {key: buckets[key]() for key in self.temporal_keys}, index=dates.index
+        )
+
+    def apply_schema(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Cast the columns of the data declared in the schema, the others are kept.
+
+        Args:
+            data: Data to cast.
+
+        Returns:
+            The data with the schema dtypes.
+        """
+        dtypes = {
+            column: dtype
+            for column, dtype in (self.schema or {}).items()
+            if column in data.columns and data[column].dtype != dtype
+        }
+
+        return data.astype(dtypes) if dtypes else data
+
+    def log_memory_usage(self, stage: str, data: pd.DataFrame):
+        """
+        Log the memory used by the data at a processing stage.
+
+        Args:
+            stage: Name of the processing stage.
+            data: Data of the stage.
+        """
+        logger.debug(
+            f"({self.dataset_name}) {stage} data uses ({data.memory_usage(deep=True).sum() / 1024**2:0.1f}) MB..."
+        )
+
+    def locate_in_grid(
+        self, data: gpd.GeoDataFrame, grid: GeoSpatialDataset
+    ) -> gpd.GeoDataFrame:
+        """
+        Assign the grid id of each point of the dataset.
+
+        Regular grids are located by arithmetic with their grid index, other grids
+        (or non point datasets) fall back to a spatial join. Points located on the
+        edge of two cells are assigned to a single cell.
+
+        Args:
+            data: Dataset to locate, using the same projection as the grid.
+            grid: The grid.
+
+        Returns:
+            The dataset with the grid columns, grid id is NaN when outside the grid.
+        """
+        if (
+            os.path.exists(self.grid_index_local_path)
+            and (data.geom_type == "Point").all()
+        ):
+            logger.debug("Locating data in grid using the grid index...")
+            grid_index = GridIndex().load_from_path(self.grid_index_local_path)
+            grid_ids = grid_index.locate(
+                x=data.geometry.x.to_numpy(), y=data.geometry.y.to_numpy()
+            )
+            located_data = data.assign(
+                grid_id=np.where(grid_ids >= 0, grid_ids, np.nan)
+            )
+
+            # join the other grid columns if any
+            grid_columns = grid.data.columns.drop(["geometry", "grid_id"])
+            if len(grid_columns) > 0:
+                located_data = located_data.merge(
+                    grid.data[["grid_id", *grid_columns]], on="grid_id", how="left"
+                ).set_axis(located_data.index)
+
+            return located_data
+
+        logger.debug("Locating data in grid using a spatial join...")
+        located_data = data.sjoin(grid.data, how="left", rsuffix="grid")
+
+        # points on the limits of multiple cells are joined more than once
+        located_data = located_data[~located_data.index.duplicated(keep="first")]
+
+        return located_data.drop(columns=["index_grid"])
+
     @abstractmethod
     def data_load(self):
         """
@@ -104,21 +268,129 @@ class DataProcessor(ABC):
         pass
 
     @staticmethod
-    def validate_settings_batch(data_settings: List[DataSourceInfo]):
+    def validate_settings_batch(
+        data_settings: List[DataSourceInfo],
+        max_workers: int = MAX_DOWNLOAD_WORKERS,
+        max_downloads_per_host: int = MAX_DOWNLOADS_PER_HOST,
+        max_retries: int = MAX_DOWNLOAD_RETRIES,
+    ):
+        """
+        Validate the files of the data sources concurrently.
+
+        Args:
+            data_settings: Settings of the data sources to validate.
+            max_workers: Number of files validated at the same time.
+            max_downloads_per_host: Number of files validated at the same time per remote host.
+            max_retries: Number of retries of a failed file validation.
+        """
         logger.debug(f"Request to validate ({len(data_settings)}) datasets...")
 
+        files_to_validate = []
         for db_setting in data_settings:
             # get all local paths
             local_paths = db_setting.get_db_local_paths()
 
-            for key, value in db_setting.remote.items():
+            for key, value in db_setting.get_remote_files_to_validate().items():
                 if value:
-                    DataProcessor.validate_file(
-                        remote_url=value, local_path=local_paths[key]
-                    )
+                    files_to_validate.append((value, local_paths[key]))
                 else:
                     logger.debug(f"Ignoring empty key {key}...")
 
+        hosts_limits = {
+            urllib.parse.urlparse(remote_url).netloc: threading.Semaphore(
+                max_downloads_per_host
+            )
+            for remote_url, _ in files_to_validate
+        }
+
+        start = time.perf_counter()
+        files_elapsed_time = 0
+        failed_files = []
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(
+                    DataProcessor._validate_file_with_retry,
+                    remote_url=remote_url,
+                    local_path=local_path,
+                    host_limit=hosts_limits[urllib.parse.urlparse(remote_url).netloc],
+                    max_retries=max_retries,
+                ): local_path
+                for remote_url, local_path in files_to_validate
+            }
+
+            for idx, future in enumerate(as_completed(futures), start=1):
+                local_path = futures[future]
+                try:
+                    elapsed_time = future.result()
+                except Exception as error:
+                    logger.error(f"Unable to validate file ({local_path}): {error}")
+                    failed_files.append(local_path)
+                    continue
+
+                files_elapsed_time += elapsed_time
+                logger.info(
+                    f"({idx}/{len(futures)}) File ({local_path}) validated "
+                    f"in {elapsed_time: 0.2f} seconds"
+                )
+
+        logger.info(
+            f"Validated ({len(files_to_validate) - len(failed_files)}/{len(files_to_validate)}) "
+            f"files in {time.perf_counter() - start: 0.2f} seconds "
+            f"(sequential time: {files_elapsed_time: 0.2f} seconds)"
+        )
+
+        if failed_files:
+            raise IOError(f"Unable to validate files {failed_files}")
+
+    @staticmethod
+    def _validate_file_with_retry(
+        remote_url: str,
+        local_path: str,
+        host_limit: threading.Semaphore,
+        max_retries: int = MAX_DOWNLOAD_RETRIES,
+        backoff: float = DOWNLOAD_RETRY_BACKOFF,
+    ) -> float:
+        """
+        Validate a file, retrying with an exponential backoff on transient errors.
+
+        Args:
+            remote_url: Remote URL of the file.
+            local_path: Local path of the file.
+            host_limit: Semaphore limiting the concurrent downloads from the remote host.
+            max_retries: Number of retries (default: 3).
+            backoff: Seconds waited before the first retry, doubled at each retry (default: 2).
+
+        Returns:
+            The time spent validating the file, in seconds.
+        """
+        for attempt in range(max_retries + 1):
+            with host_limit:
+                start = time.perf_counter()
+                try:
+                    DataProcessor.validate_file(
+                        remote_url=remote_url, local_path=local_path
+                    )
+                    return time.perf_counter() - start
+                except urllib.error.HTTPError as error:
+                    # client errors will not go away by retrying
+                    if error.code < 500 and error.code not in RETRY_HTTP_CODES:
+                        raise
+                    if attempt == max_retries:
+                        raise
+                    last_error = error
+                except (urllib.error.URLError, OSError) as error:
+                    if attempt == max_retries:
+                        raise
+                    last_error = error
+
+            wait_time = backoff * 2**attempt
+            logger.warning(
+                f"Validation of ({local_path}) failed ({last_error}), "
+                f"retrying in {wait_time} seconds..."
+            )
+            time.sleep(wait_time)
+
     @staticmethod
     def validate_file(remote_url: str, local_path: str):
         """
@@ -129,34 +401,99 @@ class DataProcessor(ABC):
             local_path: Local path of the file.
         """
         local_hash = None
+        metadata_store = RemoteMetadataStore(directory=os.path.dirname(local_path))
+        remote_metadata = None
 
         logger.debug(f"Validating local file {local_path}...")
 
-        # Check if the file exists and hash its contents
+        # Check if the file exists and get what is known about its remote
         if os.path.exists(local_path):
             if not DataProcessor._is_update_required(file_path=local_path):
                 return
 
-            with open(local_path, "rb") as file:
-                data = file.read()
-            local_hash = hashlib.md5(data).hexdigest()
+            remote_metadata = metadata_store.get(remote_url)
+
+        # Download next to the local file, it is only swapped in if it changed
+        download_path = local_path + ".part"
+        headers = RemoteMetadataStore.to_conditional_headers(remote_metadata)
+
+        # Resume a previous download that was interrupted
+        partial_metadata = metadata_store.get_partial(remote_url)
+        offset = os.path.getsize(download_path) if os.path.exists(download_path) else 0
+        range_headers = RemoteMetadataStore.to_range_headers(partial_metadata, offset)
+        headers.update(range_headers)
 
         logger.info(f"Reading remote URL {remote_url}...")
-        web_url = urllib.request.Request(remote_url)
+        web_url = urllib.request.Request(remote_url, headers=headers)
         web_url.add_header("User-Agent", "Mozilla/5.0")
 
-        with urllib.request.urlopen(web_url) as downloaded_file:
-            remote_data = downloaded_file.read()
-            remote_hash = hashlib.md5(remote_data).hexdigest()
+        try:
+            with urllib.request.urlopen(web_url) as downloaded_file:
+                resume = downloaded_file.status == HTTPStatus.PARTIAL_CONTENT
 
-            if local_hash != remote_hash:
-                DataProcessor._save_remote_file(data=remote_data, file_path=local_path)
-                logger.info("File updated...")
-            else:
-                date = datetime.datetime.now()
-                mod_time = time.mktime(date.timetuple())
-                os.utime(local_path, (mod_time, mod_time))
-                logger.info("File is already up-to-date...")
+                if resume:
+                    logger.info(f"Resuming download at byte ({offset})...")
+                else:
+                    if range_headers:
+                        logger.info("Remote file changed, restarting download...")
+                    partial_metadata = RemoteMetadataStore.from_headers(
+                        downloaded_file.headers
+                    )
+                    metadata_store.put_partial(remote_url, partial_metadata)
+
+                remote_hash = DataProcessor._save_remote_file(
+                    data=downloaded_file, file_path=download_path, resume=resume
+                )
+                remote_metadata = partial_metadata
+
+                # a dropped connection ends the stream early, keep what was received
+                content_length = downloaded_file.headers.get("Content-Length")
+                expected_size = (offset if resume else 0) + int(content_length or 0)
+                if content_length and os.path.getsize(download_path) != expected_size:
+                    raise IOError(
+                        f"Download of ({remote_url}) interrupted at byte "
+                        f"({os.path.getsize(download_path)}) of ({expected_size})"
+                    )
+        except urllib.error.HTTPError as error:
+            if (
+                error.code == HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE
+                and range_headers
+            ):
+                logger.warning("Unable to resume download, restarting...")
+                os.remove(download_path)
+                return DataProcessor.validate_file(remote_url, local_path)
+
+            if error.code != HTTPStatus.NOT_MODIFIED:
+                raise
+
+            DataProcessor._touch_file(local_path)
+            logger.info("File is already up-to-date (not modified)...")
+            return
+
+        if os.path.exists(local_path):
+            local_hash = get_file_hash(local_path)
+
+        if local_hash != remote_hash:
+            os.replace(download_path, local_path)
+            logger.info("File updated...")
+        else:
+            os.remove(download_path)
+            DataProcessor._touch_file(local_path)
+            logger.info("File is already up-to-date...")
+
+        metadata_store.put(remote_url, remote_metadata)
+
+    @staticmethod
+    def _touch_file(file_path: str):
+        """
+        Set the modification time of the file to now.
+
+        Args:
+            file_path: Path of the file.
+        """
+        date = datetime.datetime.now()
+        mod_time = time.mktime(date.timetuple())
+        os.utime(file_path, (mod_time, mod_time))
 
     @staticmethod
     def _is_update_required(file_path: str, days_since_last_update: int = 7) -> bool:
@@ -183,13 +520,24 @@ class DataProcessor(ABC):
             return False
 
     @staticmethod
-    def _save_remote_file(data, file_path: str):
+    def _save_remote_file(
+        data: BinaryIO,
+        file_path: str,
+        chunk_size: int = CHUNK_SIZE,
+        resume: bool = False,
+    ) -> str:
         """
-        Save the data to a file.
+        Stream the data to a file, hashing it on the way.
 
         Args:
-            data: Data to be saved.
+            data: Readable binary stream to be saved.
             file_path: Path of the file.
+            chunk_size: Number of bytes read at a time (default: 1MB).
+            resume: Append the data to the existing file instead of replacing it
+                (default: False).
+
+        Returns:
+            The md5 hash of the whole file.
         """
         root_dir = os.path.dirname(file_path)
 
@@ -197,8 +545,29 @@ class DataProcessor(ABC):
             os.makedirs(root_dir)
             logger.debug(f"Directory ({root_dir}) created...")
 
-        with open(file_path, "wb") as file:
-            file.write(data)
+        data_hash = hashlib.md5()
+
+        # the bytes already on disk are part of the hash of the file
+        if resume:
+            with open(file_path, "rb") as file:
+                for chunk in iter(lambda: file.read(chunk_size), b""):
+                    data_hash.update(chunk)
+
+        downloaded_bytes = 0
+        start_time = time.perf_counter()
+
+        with open(file_path, "ab" if resume else "wb") as file:
+            for chunk in iter(lambda: data.read(chunk_size), b""):
+                data_hash.update(chunk)
+                file.write(chunk)
+                downloaded_bytes += len(chunk)
+
+        elapsed_time = time.perf_counter() - start_time
+        byte_rate = downloaded_bytes / elapsed_time if elapsed_time > 0 else 0
+        logger.info(
+            f"Downloaded ({downloaded_bytes / 1e6:.1f}) MB in ({elapsed_time:.2f}) "
+            f"seconds ({byte_rate / 1e6:.2f} MB/s)..."
+        )
 
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File {file_path} was not found!")
@@ -208,3 +577,5 @@ class DataProcessor(ABC):
                 logger.info(f"File '{file_path}' downloaded and ready...")
             else:
                 raise IOError(f"Unable to read downloaded file '{file_path}'")
+
+        return data_hash.hexdigest()
@@ -7,7 +7,9 @@ from haversine import Unit
 from data.prep.abstract_processor import DataProcessor
 from data.types.geospatial_dataset import GeoSpatialDataset
 from data.types.tabular_dataset import TabularDataset
+from utils.enums.temporal_resolutions import TemporalResolution
 from utils.exceptions import InvalidOperation
+from utils.operations import count_by
 
 NOT_RELEVANT_FEATURES = ["X", "Y", "PDQ", "LONGITUDE", "LATITUDE"]
 logger = get_logger(__name__)
@@ -18,6 +20,8 @@ class DatasetCrime(DataProcessor):
     Class for processing crime dataset.
     """
 
+    source_columns = ["CATEGORIE", "DATE", "QUART", "LONGITUDE", "LATITUDE"]
+
     def __init__(
         self,
         dataset_settings: DataSourceInfo,
@@ -28,6 +32,7 @@ class DatasetCrime(DataProcessor):
         processed_file_path: str,
         remove_not_relevant: bool = True,
         drop_na_values: bool = True,
+        temporal_resolution: TemporalResolution = TemporalResolution.DAY,
     ):
         """
         Initialize the DatasetCrime.
@@ -38,6 +43,7 @@ class DatasetCrime(DataProcessor):
             grid_units: Units for grid creation.
             remove_not_relevant: Whether to remove not relevant features (default: True).
             drop_na_values: Whether to drop rows with NaN values (default: True).
+            temporal_resolution: Periods of the aggregated counts (default: DAY).
         """
         super().__init__(
             grid_distance=grid_distance,
@@ -45,6 +51,7 @@ class DatasetCrime(DataProcessor):
             grid_generic_filepath=grid_generic_filepath,
             processed_root_dir=processed_root_dir,
             processed_file_path=processed_file_path,
+            temporal_resolution=temporal_resolution,
         )
 
         self._settings = dataset_settings
@@ -55,6 +62,10 @@ class DatasetCrime(DataProcessor):
         self.remove_not_relevant: bool = remove_not_relevant
         self.drop_na_values: bool = drop_na_values
 
+        # not relevant features are only read when they are kept
+        if not self.remove_not_relevant:
+            self.source_columns = None
+
     @property
     def settings(self):
         return self._settings
@@ -82,7 +93,7 @@ class DatasetCrime(DataProcessor):
         if not os.path.exists(self.dataset_local_path):
             raise FileNotFoundError(f"Unable to find ({self.dataset_local_path})")
 
-        self.dataset.load_from_path(self.dataset_local_path)
+        self.load_source(self.dataset, self.dataset_local_path)
 
         # Drop row that has all NaN values
         len_crimes_data_raw = len(self.dataset.data)
@@ -101,7 +112,9 @@ class DatasetCrime(DataProcessor):
             )
 
         if self.remove_not_relevant:
-            self.dataset.data.drop(columns=NOT_RELEVANT_FEATURES, axis=1, inplace=True)
+            self.dataset.data.drop(
+                columns=NOT_RELEVANT_FEATURES, errors="ignore", inplace=True
+            )
 
         self.dataset.data = self.dataset.data.reset_index()
 
@@ -125,14 +138,11 @@ class DatasetCrime(DataProcessor):
         # make sure they're using the same projection reference and merge
         self.dataset.data.crs = self.grid.data.crs
 
-        self.curated_dataset.data = self.dataset.data.sjoin(self.grid.data, how="left")
+        self.curated_dataset.data = self.locate_in_grid(self.dataset.data, self.grid)
 
         # drop data not required
-        self.curated_dataset.data = self.curated_dataset.data.drop_duplicates(
-            subset=["index"], keep="first"
-        )
         self.curated_dataset.data = self.curated_dataset.data.drop(
-            labels=["geometry", "index_right"], axis=1
+            labels=["geometry"], axis=1
         )
 
         # clean and save data
@@ -168,23 +178,15 @@ class DatasetCrime(DataProcessor):
         """
         logger.info(f"Aggregating data ({self.dataset_name})...")
 
-        grouped_data = (
-            self.curated_dataset.data.groupby(["grid_id", "DATE", "CATEGORIE"])["index"]
-            .count()
-            .reset_index()
-            .rename(columns={"index": "INCIDENT_COUNT"})
-        )
-
-        one_hot = pd.get_dummies(grouped_data["CATEGORIE"])
-        one_hot = one_hot.multiply(grouped_data["INCIDENT_COUNT"], axis="index")
+        # one column per crime category, counted by cell and period
+        keys_data = self.get_temporal_buckets(self.curated_dataset.data["DATE_DT"])
+        keys_data.insert(0, "grid_id", self.curated_dataset.data["grid_id"])
 
-        self.aggregated_dataset.data = grouped_data.join(one_hot)
-        self.aggregated_dataset.data = self.aggregated_dataset.data.sort_values(
-            by="INCIDENT_COUNT", ascending=False
-        ).reset_index(drop=True)
-        self.aggregated_dataset.data = self.aggregated_dataset.data.drop(
-            ["CATEGORIE", "INCIDENT_COUNT"], axis=1
-        )
+        self.aggregated_dataset.data = count_by(
+            keys_data,
+            by=list(keys_data.columns),
+            labels=self.curated_dataset.data["CATEGORIE"],
+        ).reset_index()
 
         self.aggregated_dataset.save_data(
             filepath=self.to_local_file_path(self.dataset_name)
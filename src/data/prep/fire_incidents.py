@@ -1,5 +1,6 @@
 import os.path
 
+import numpy as np
 import pandas as pd
 
 from config.data_source_info import DataSourceInfo
@@ -8,18 +9,10 @@ from haversine import Unit
 from data.prep.abstract_processor import DataProcessor
 from data.types.geospatial_dataset import GeoSpatialDataset
 from data.types.tabular_dataset import TabularDataset
-from utils.conversions import time_to_category
+from utils.conversions import times_to_categories
+from utils.enums.temporal_resolutions import TemporalResolution
 from utils.exceptions import InvalidOperation
-
-NOT_RELEVANT_FEATURES = [
-    "NOM_VILLE",
-    "NOM_ARROND",
-    "MTM8_X",
-    "MTM8_Y",
-    "LATITUDE",
-    "LONGITUDE",
-    "DIVISION",
-]
+from utils.operations import count_by
 
 CATEGORIES = {
     "DESCRIPTION_GROUPE": [
@@ -44,6 +37,10 @@ CATEGORIES = {
     ],
     "TYPE": ["C", "C", "C", "B", "A", "C", "C", "C"],
 }
+# incidents counted by class, fires (type A or B) and other incidents (type C)
+COUNT_COLUMNS = ["INCIDENT_COUNT", "OTHER_FIRES_COUNT"]
+# calendar months, whatever the temporal resolution of the other counts
+MONTHLY_KEYS = ["YEAR", "MONTH"]
 
 
 logger = get_logger(__name__)
@@ -54,6 +51,24 @@ class DatasetFireIncidents(DataProcessor):
     Class for processing crime dataset.
     """
 
+    source_columns = ["CREATION_D", "DESCRIPTIO", "CASERNE", "NOMBRE_UNI"]
+    schema = {
+        "INCIDENT_N": "int32",
+        "CREATION_D": "datetime64[ms]",
+        "CASERNE": "Int8",
+        "NOMBRE_UNI": "Int16",
+        "DIVISION": "Int8",
+        "YEAR": "int16",
+        "MONTH": "int8",
+        "QUARTER": "int8",
+        "DAY": "int8",
+        "SHIFT": "category",
+        "DESCRIPTION_GROUPE": "category",
+        "GROUP": "category",
+        "TYPE": "category",
+        "grid_id": "int32",
+    }
+
     def __init__(
         self,
         dataset_settings: DataSourceInfo,
@@ -64,6 +79,10 @@ class DatasetFireIncidents(DataProcessor):
         processed_file_path: str,
         remove_not_relevant: bool = True,
         add_time_categories: bool = True,
+        keep_unknown_groups: bool = False,
+        monthly_counts: bool = False,
+        shift_counts: bool = False,
+        temporal_resolution: TemporalResolution = TemporalResolution.QUARTER,
     ):
         """
         Initialize the DatasetCrime.
@@ -74,6 +93,12 @@ class DatasetFireIncidents(DataProcessor):
             grid_units: Units for grid creation.
             remove_not_relevant: Whether to remove not relevant features (default: True).
             drop_na_values: Whether to drop rows with NaN values (default: True).
+            keep_unknown_groups: Whether to keep the incidents whose description is
+                not in CATEGORIES, without group nor type (default: False).
+            monthly_counts: Whether to also save the counts by calendar month, keyed
+                by YEAR and MONTH at any temporal resolution (default: False).
+            shift_counts: Whether to also save the counts by shift (default: False).
+            temporal_resolution: Periods of the aggregated counts (default: QUARTER).
         """
         super().__init__(
             grid_distance=grid_distance,
@@ -81,16 +106,26 @@ class DatasetFireIncidents(DataProcessor):
             grid_generic_filepath=grid_generic_filepath,
             processed_root_dir=processed_root_dir,
             processed_file_path=processed_file_path,
+            temporal_resolution=temporal_resolution,
         )
 
         self._settings = dataset_settings
         self.curated_dataset = TabularDataset()
         self.aggregated_dataset = TabularDataset()
         self.aggregated_dataset_other = TabularDataset()
+        self.aggregated_dataset_monthly = TabularDataset()
+        self.aggregated_dataset_shifts = TabularDataset()
         self.dataset = GeoSpatialDataset()
         self.grid = GeoSpatialDataset()
         self.remove_not_relevant: bool = remove_not_relevant
         self.add_time_categories: bool = add_time_categories
+        self.keep_unknown_groups: bool = keep_unknown_groups
+        self.monthly_counts: bool = monthly_counts
+        self.shift_counts: bool = shift_counts
+
+        # not relevant features are only read when they are kept
+        if not self.remove_not_relevant:
+            self.source_columns = None
 
     @property
     def settings(self):
@@ -114,9 +149,9 @@ class DatasetFireIncidents(DataProcessor):
         """
         Loads the dataset.
         """
-        self.dataset.load_from_path(self.dataset_local_path)
-
-        self.dataset.data.drop(columns=NOT_RELEVANT_FEATURES, axis=1, inplace=True)
+        self.load_source(self.dataset, self.dataset_local_path)
+        self.dataset.data = self.apply_schema(self.dataset.data)
+        self.log_memory_usage("loaded", self.dataset.data)
 
         self.grid.load_from_path(local_path=self.grid_local_path)
 
@@ -130,7 +165,9 @@ class DatasetFireIncidents(DataProcessor):
             )
 
         self.pre_process_dataset()
+        self.log_memory_usage("pre-processed", self.dataset.data)
         self.curate_dataset()
+        self.log_memory_usage("curated", self.curated_dataset.data)
         # save files:
         self.curated_dataset.save_data(
             filepath=self.to_local_file_path(self.dataset_name)
@@ -142,27 +179,17 @@ class DatasetFireIncidents(DataProcessor):
         """
         Aggregate the data.
         """
-        fires_only_mtl = self.curated_dataset.data[
-            self.curated_dataset.data["TYPE"] != "C"
-        ]
-        no_fires_mtl = self.curated_dataset.data[
-            self.curated_dataset.data["TYPE"] == "C"
-        ]
-
-        # aggregate tax rolls by grid id
-        self.aggregated_dataset.data = (
-            fires_only_mtl.groupby(["grid_id", "YEAR", "QUARTER"])["INCIDENT_N"]
-            .count()
-            .reset_index()
-            .rename(columns={"INCIDENT_N": "INCIDENT_COUNT"})
-        )
-
-        self.aggregated_dataset_other.data = (
-            no_fires_mtl.groupby(["grid_id", "YEAR", "QUARTER"])["INCIDENT_N"]
-            .count()
-            .reset_index()
-            .rename(columns={"INCIDENT_N": "OTHER_FIRES_COUNT"})
-        )
+        counts = self.count_incidents()
+
+        # fires and other incidents are saved apart, without their empty counts
+        keys = ["grid_id", *self.temporal_keys]
+        period_counts = self.rollup_counts(counts, by=keys)
+        self.aggregated_dataset.data = period_counts.loc[
+            period_counts["INCIDENT_COUNT"] > 0, [*keys, "INCIDENT_COUNT"]
+        ].reset_index(drop=True)
+        self.aggregated_dataset_other.data = period_counts.loc[
+            period_counts["OTHER_FIRES_COUNT"] > 0, [*keys, "OTHER_FIRES_COUNT"]
+        ].reset_index(drop=True)
 
         # save aggregated data
         self.aggregated_dataset.save_data(
@@ -173,18 +200,111 @@ class DatasetFireIncidents(DataProcessor):
             filepath=self.to_local_file_path("other" + self.dataset_name)
         )
 
+        if self.monthly_counts:
+            self.aggregated_dataset_monthly.data = self.rollup_counts(
+                counts, by=["grid_id", *MONTHLY_KEYS]
+            )
+            self.aggregated_dataset_monthly.save_data(
+                filepath=self.to_local_file_path(self.dataset_name + "_monthly")
+            )
+
+        if self.shift_counts:
+            self.aggregated_dataset_shifts.data = self.rollup_counts(
+                counts, by=[*keys, "SHIFT"]
+            )
+            self.aggregated_dataset_shifts.save_data(
+                filepath=self.to_local_file_path(self.dataset_name + "_shifts")
+            )
+
+    def count_incidents(self) -> pd.DataFrame:
+        """
+        Count the fires and other incidents in a single pass, by period at the
+        temporal resolution and by the finer keys required by the aggregations.
+
+        Returns:
+            pd.DataFrame: One column per incident class of COUNT_COLUMNS, indexed by
+            the grouping keys.
+        """
+        data = self.curated_dataset.data
+
+        # periods at the temporal resolution, refined by the optional counts
+        keys_data = self.get_temporal_buckets(data["CREATION_D"])
+        keys_data.insert(0, "grid_id", data["grid_id"])
+        if self.monthly_counts:
+            for key in MONTHLY_KEYS:
+                if key not in keys_data:
+                    keys_data[key] = data[key]
+        if self.shift_counts:
+            keys_data["SHIFT"] = data["SHIFT"]
+
+        # incidents without type are not counted
+        incident_class = pd.Categorical.from_codes(
+            np.where(data["TYPE"].isna(), -1, data["TYPE"] == "C"),
+            categories=COUNT_COLUMNS,
+        )
+
+        return count_by(keys_data, by=list(keys_data.columns), labels=incident_class)
+
+    @staticmethod
+    def rollup_counts(counts: pd.DataFrame, by: list) -> pd.DataFrame:
+        """
+        Sum the incident counts over the grouping keys not in by.
+
+        Args:
+            counts (pd.DataFrame): Incident counts, from count_incidents.
+            by (list): Grouping keys to keep.
+
+        Returns:
+            pd.DataFrame: The incident counts by the given keys.
+        """
+        if list(counts.index.names) != by:
+            counts = counts.groupby(level=by, observed=True).sum()
+
+        return counts.reset_index()
+
+    def map_categories(self):
+        """
+        Add the GROUP and TYPE categories of each incident, looked up from the codes
+        of its description in CATEGORIES. Unknown or missing descriptions are
+        reported, and their incidents dropped unless keep_unknown_groups is set.
+        """
+        # missing descriptions are unknown, only the "nan" text is in the table
+        descriptions = self.dataset.data["DESCRIPTIO"]
+        description_codes = pd.Categorical(
+            descriptions, categories=CATEGORIES["DESCRIPTION_GROUPE"]
+        ).codes
+        is_unknown = description_codes < 0
+
+        for column in ["GROUP", "TYPE"]:
+            label_codes, labels = pd.factorize(pd.Series(CATEGORIES[column]))
+            self.dataset.data[column] = pd.Categorical.from_codes(
+                np.where(is_unknown, -1, label_codes[description_codes]),
+                categories=labels,
+            )
+
+        self.dataset.data = self.dataset.data.drop(
+            labels=["INCIDENT_T", "INCIDENT_N"], axis=1, errors="ignore"
+        ).rename(columns={"DESCRIPTIO": "DESCRIPTION_GROUPE"})
+        self.dataset.data["DESCRIPTION_GROUPE"] = pd.Categorical(descriptions)
+
+        if is_unknown.any():
+            unknown_counts = descriptions[is_unknown].value_counts(dropna=False)
+            logger.warning(
+                f"({is_unknown.sum()}) incidents have an unknown description: {unknown_counts.to_dict()}"
+            )
+
+            if not self.keep_unknown_groups:
+                self.dataset.data = self.dataset.data[~is_unknown].reset_index(
+                    drop=True
+                )
+
     def curate_dataset(self):
         # make sure they're using the same projection reference and merge
         self.dataset.data = self.dataset.data.to_crs(epsg=4326)
         self.dataset.data.crs = self.grid.data.crs
-        self.curated_dataset.data = self.dataset.data.sjoin(
-            self.grid.data, how="left", rsuffix="grid"
-        )
 
-        # some incidents are in the limits of multiple boroughts, just pick one (first) of them.
-        self.curated_dataset.data = self.curated_dataset.data.drop_duplicates(
-            subset=["INCIDENT_N"], keep="first"
-        )
+        # some incidents are in the limits of multiple cells, only one of them is kept.
+        self.curated_dataset.data = self.locate_in_grid(self.dataset.data, self.grid)
         dataset_size = len(self.curated_dataset.data)
 
         self.curated_dataset.data = self.curated_dataset.data.dropna(subset=["grid_id"])
@@ -193,11 +313,10 @@ class DatasetFireIncidents(DataProcessor):
             f"({dataset_size - len(self.curated_dataset.data)}) incidents were not located in the grid..."
         )
 
-        self.curated_dataset.data.drop(columns=["index_grid"], axis=1, inplace=True)
-        # preserve dtypes
-        self.curated_dataset.data = self.curated_dataset.data.astype(
-            {"grid_id": "int64"}
-        )
+        # preserve dtypes, the incidents are identified by their number
+        self.curated_dataset.data = self.apply_schema(
+            self.curated_dataset.data
+        ).reset_index(drop=True)
 
     def pre_process_dataset(self):
         logger.debug(
@@ -213,32 +332,20 @@ class DatasetFireIncidents(DataProcessor):
         self.dataset.data["MONTH"] = self.dataset.data["CREATION_D"].dt.month
         self.dataset.data["QUARTER"] = self.dataset.data["CREATION_D"].dt.quarter
         self.dataset.data["DAY"] = self.dataset.data["CREATION_D"].dt.day
-        self.dataset.data["SHIFT"] = self.dataset.data["CREATION_D"].dt.time.map(
-            time_to_category
+        self.dataset.data["SHIFT"] = times_to_categories(
+            self.dataset.data["CREATION_D"]
         )
 
         # select only years
         # self.dataset.data = self.dataset.data[self.dataset.data["CREATION_D"].dt.year >= 2016]
-        # self.dataset.data = self.dataset.data.astype(
-        #     {
-        #         'NOMBRE_UNI': 'int8',
-        #         'DIVISION': 'int8',
-        #         'CASERNE': 'int8',
-        #     }
-        # )
-        # merge group / type
-        categories_df = pd.DataFrame.from_dict(CATEGORIES)
-
-        self.dataset.data = self.dataset.data.merge(
-            categories_df, left_on="DESCRIPTIO", right_on="DESCRIPTION_GROUPE"
-        )
-        self.dataset.data = self.dataset.data.drop(
-            labels=["INCIDENT_T", "DESCRIPTIO"], axis=1
-        )
-        # drop incident number
-        self.dataset.data = self.dataset.data.drop(labels=["INCIDENT_N"], axis=1)
+
+        # map group / type through the description codes
+        self.map_categories()
+
+        # number the incidents
         self.dataset.data = self.dataset.data.reset_index()
         self.dataset.data = self.dataset.data.rename(columns={"index": "INCIDENT_N"})
+        self.dataset.data = self.apply_schema(self.dataset.data)
 
         logger.debug(
             f"Dataset ({self.dataset_name}) length is now: '{len(self.dataset.data)}'"
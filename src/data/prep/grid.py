@@ -1,13 +1,17 @@
-import os
 import geopandas as gpd
-import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import shapely
 
-from shapely import geometry
 from config.data_source_info import DataSourceInfo
 from config.logs import get_logger
 from haversine import inverse_haversine, Unit
+from data.cache.grid_cache import GridCache
 from data.prep.abstract_processor import DataProcessor
 from data.types.geospatial_dataset import GeoSpatialDataset
+from data.types.grid_index import GridIndex
+from data.types.grid_manifest import GridManifest
+from utils.custom_file_io import get_file_hash
 
 
 logger = get_logger(__name__)
@@ -22,6 +26,9 @@ class DataGrid(DataProcessor):
         grid_distance: int,
         grid_units: Unit,
         expand_data: bool = False,
+        plot_diagnostics: bool = False,
+        plot_max_cells: int = 20000,
+        cache_max_entries: int = 4,
     ):
         super().__init__(
             processed_root_dir="",
@@ -36,6 +43,10 @@ class DataGrid(DataProcessor):
         self.grid = GeoSpatialDataset()
         self.first_layer = GeoSpatialDataset()
         self.expand_data = expand_data
+        self.plot_diagnostics = plot_diagnostics
+        self.plot_max_cells = plot_max_cells
+        self.grid_cache = GridCache(max_entries=cache_max_entries)
+        self.grid_manifest: GridManifest = None
 
     @property
     def dataset_name(self):
@@ -45,16 +56,33 @@ class DataGrid(DataProcessor):
         """
         Load data for processing.
         """
-        if os.path.exists(self.grid_local_path):
+        self.first_layer.load_from_path(
+            self.first_layer_db_settings.get_local_working_file_path()
+        )
+        second_layer_hash = get_file_hash(
+            self.second_layer_db_settings.get_local_working_file_path()
+        )
+
+        self.grid_manifest = GridManifest(
+            cache_key=GridCache.get_key(
+                first_layer_hash=self.first_layer.ds_hash,
+                second_layer_hash=second_layer_hash,
+                distance=self.grid_distance,
+                units=str(self.grid_units.value),
+                expand_data=self.expand_data,
+            ),
+            distance=self.grid_distance,
+            units=str(self.grid_units.value),
+            expand_data=self.expand_data,
+            first_layer_hash=self.first_layer.ds_hash,
+            second_layer_hash=second_layer_hash,
+        )
+
+        if self.grid_cache.get(self.grid_local_path, self.grid_manifest.cache_key):
             logger.info("Loading existing grid file...")
             self.grid.load_from_path(self.grid_local_path)
         else:
-            logger.debug(
-                "Grid not found. Getting the layering data from previously validated file..."
-            )
-            self.first_layer.load_from_path(
-                self.first_layer_db_settings.get_local_working_file_path()
-            )
+            logger.debug("Grid not found or stale. A new grid will be generated...")
 
     def data_validate(self):
         """
@@ -69,14 +97,25 @@ class DataGrid(DataProcessor):
         Transform the data by creating a grid.
         """
         if self.grid.data is None:
-            self.grid.data = DataGrid.create_grid(
+            self.grid = DataGrid.create_grid(
                 first_layer_data=self.first_layer,
                 distance=self.grid_distance,
                 units=self.grid_units,
                 second_layer_local_path=self.second_layer_db_settings.get_local_working_file_path(),
                 save_as_file=self.grid_local_path,
+                save_index_as_file=self.grid_index_local_path,
                 expand_data=self.expand_data,
             )
+            self.grid_cache.put(self.grid_local_path, self.grid_manifest)
+
+            if self.plot_diagnostics:
+                DataGrid.plot_grid(
+                    grid_data=self.grid,
+                    first_layer_data=self.first_layer,
+                    second_layer_local_path=self.second_layer_db_settings.get_local_working_file_path(),
+                    save_as_file=self.grid_local_path + ".pdf",
+                    max_cells=self.plot_max_cells,
+                )
 
     def data_aggregate(self):
         """
@@ -85,6 +124,104 @@ class DataGrid(DataProcessor):
         # Not required for this class
         pass
 
+    @staticmethod
+    def get_fishnet_shape(
+        min_x: float, min_y: float, max_x: float, max_y: float, grid_size: float
+    ) -> tuple:
+        """
+        Get the number of rows and columns of the fishnet covering the given bounds.
+
+        Args:
+            min_x (float): Lower bound of the fishnet on the x axis.
+            min_y (float): Lower bound of the fishnet on the y axis.
+            max_x (float): Upper bound of the fishnet on the x axis.
+            max_y (float): Upper bound of the fishnet on the y axis.
+            grid_size (float): Size of a cell, in the units of the bounds.
+
+        Returns:
+            tuple: The number of rows and columns.
+        """
+        n_rows = int(np.floor((max_y - min_y) / grid_size)) + 1
+        n_cols = int(np.floor((max_x - min_x) / grid_size)) + 1
+
+        return n_rows, n_cols
+
+    @staticmethod
+    def create_fishnet(
+        min_x: float, min_y: float, max_x: float, max_y: float, grid_size: float
+    ) -> gpd.GeoDataFrame:
+        """
+        Generate a regular fishnet covering the given bounds.
+
+        All the cell corners are computed at once with NumPy and the polygons are
+        created in bulk, cells are numbered row by row starting at (min_x, min_y).
+
+        Args:
+            min_x (float): Lower bound of the fishnet on the x axis.
+            min_y (float): Lower bound of the fishnet on the y axis.
+            max_x (float): Upper bound of the fishnet on the x axis.
+            max_y (float): Upper bound of the fishnet on the y axis.
+            grid_size (float): Size of a cell, in the units of the bounds.
+
+        Returns:
+            gpd.GeoDataFrame: One row per cell with its row, column, name and id.
+        """
+        n_rows, n_cols = DataGrid.get_fishnet_shape(
+            min_x=min_x, min_y=min_y, max_x=max_x, max_y=max_y, grid_size=grid_size
+        )
+
+        # Cell ids, row major
+        row_ids, col_ids = np.divmod(np.arange(n_rows * n_cols), n_cols)
+
+        # Lower left corner of every cell
+        x = min_x + col_ids * grid_size
+        y = min_y + row_ids * grid_size
+
+        grid = gpd.GeoDataFrame(
+            {
+                "geometry": shapely.box(x, y, x + grid_size, y + grid_size, ccw=False),
+                "grid_row_id": row_ids,
+                "grid_col_id": col_ids,
+                "grid_name": "("
+                + pd.Series(row_ids).astype(str)
+                + ","
+                + pd.Series(col_ids).astype(str)
+                + ")",
+                "grid_id": np.arange(n_rows * n_cols),
+            },
+            geometry="geometry",
+        )
+
+        logger.debug(f"The generated grid size is ({n_rows} x {n_cols})")
+
+        return grid
+
+    @staticmethod
+    def intersects_layer(cells: gpd.GeoSeries, layer: gpd.GeoSeries) -> np.ndarray:
+        """
+        Flag the cells intersecting at least one geometry of a layer.
+
+        The layer geometries are prepared once and queried against a spatial index
+        of the cells, so no joined rows are ever materialized.
+
+        Args:
+            cells (gpd.GeoSeries): Geometries of the grid cells.
+            layer (gpd.GeoSeries): Geometries of the layer.
+
+        Returns:
+            np.ndarray: Boolean mask, True for the cells intersecting the layer.
+        """
+        layer_geometries = np.asarray(layer)
+        shapely.prepare(layer_geometries)
+
+        tree = shapely.STRtree(np.asarray(cells))
+        _, cells_idx = tree.query(layer_geometries, predicate="intersects")
+
+        is_intersecting = np.zeros(len(cells), dtype=bool)
+        is_intersecting[cells_idx] = True
+
+        return is_intersecting
+
     @staticmethod
     def create_grid(
         first_layer_data: GeoSpatialDataset,
@@ -93,6 +230,7 @@ class DataGrid(DataProcessor):
         second_layer_local_path: str = None,
         expand_data: bool = False,
         save_as_file: str = None,
+        save_index_as_file: str = None,
     ) -> GeoSpatialDataset:
         """
         Generate a grid based on geospatial data.
@@ -104,6 +242,7 @@ class DataGrid(DataProcessor):
             second_layer_local_path (str, optional): Path to the second layer data. Defaults to None.
             expand_data (bool, optional): Flag to expand data. Defaults to False.
             save_as_file (str, optional): Path to save the grid as a file. Defaults to None.
+            save_index_as_file (str, optional): Path to save the grid index as a file. Defaults to None.
 
         Returns:
             GeoSpatialDataset: Grid as a geospatial dataset.
@@ -114,10 +253,6 @@ class DataGrid(DataProcessor):
         # Get minX, minY, maxX, maxY
         min_x, min_y, max_x, max_y = total_bounds
 
-        # Create a fishnet
-        x, y = (min_x, min_y)
-        geom_array = []
-
         if units is None:
             grid_size = distance
         else:
@@ -129,46 +264,9 @@ class DataGrid(DataProcessor):
             )
             grid_size = end_pt[0] - min_x
 
-        # Start Idxs
-        row_id = 0
-        col_id = 0
-
-        while y <= max_y:
-            col_id = 0
-
-            while x <= max_x:
-                geom = geometry.Polygon(
-                    [
-                        (x, y),
-                        (x, y + grid_size),
-                        (x + grid_size, y + grid_size),
-                        (x + grid_size, y),
-                        (x, y),
-                    ]
-                )
-                grid_name = "(" + str(row_id) + "," + str(col_id) + ")"
-                geom_array.append([geom, row_id, col_id, grid_name])
-                x += grid_size
-                col_id += 1
-
-            x = min_x
-            y += grid_size
-            row_id += 1
-
-        # Create a new grid with the generated data
-        grid = gpd.GeoDataFrame(
-            geom_array, columns=["geometry", "grid_row_id", "grid_col_id", "grid_name"]
-        )
-
-        logger.debug(f"The generated grid size is ({row_id} x {col_id})")
-
-        # Generate the index
-        grid["grid_id"] = grid.index.tolist()
-
-        # Create plot
-        fig, ax = plt.subplots(figsize=(15, 15))
-        gpd.GeoSeries(first_layer_data.data["geometry"]).boundary.plot(
-            ax=ax, color="gray"
+        # Create a fishnet
+        grid = DataGrid.create_fishnet(
+            min_x=min_x, min_y=min_y, max_x=max_x, max_y=max_y, grid_size=grid_size
         )
 
         if not expand_data:
@@ -178,37 +276,110 @@ class DataGrid(DataProcessor):
         grid.crs = first_layer_data.data.crs
 
         if second_layer_local_path:
-            # Use the second layer
-            logger.debug("Applying second layer...")
-            second_layer = gpd.read_file(second_layer_local_path)
-            second_layer = second_layer.to_crs(epsg=4269)
-            grid.crs = second_layer.crs
-            cols_names = grid.columns.values
-            grid = grid.sjoin(second_layer, how="inner", rsuffix="census_right")
-            grid = grid[cols_names]
-            grid = grid.sort_values(by="grid_id", ascending=False)
-
             # Remove unused grids
             logger.debug("Applying first layer...")
-            cols_names = grid.columns.values
-            grid.crs = first_layer_data.data.crs
-            grid = grid.sjoin(first_layer_data.data, how="inner", rsuffix="right")
-            grid = grid[cols_names]
-
-            # Add to plot
-            second_layer.crs = first_layer_data.data.crs
-            second_layer_trimmed = second_layer.sjoin(
-                first_layer_data.data, how="inner", rsuffix="census_right"
+            is_kept = DataGrid.intersects_layer(
+                cells=grid.geometry, layer=first_layer_data.data.geometry
             )
-            gpd.GeoSeries(second_layer_trimmed["geometry"]).boundary.plot(
-                ax=ax, color="red"
+
+            # Use the second layer, only on the cells that are left
+            logger.debug("Applying second layer...")
+            second_layer = GeoSpatialDataset.read_file(
+                second_layer_local_path,
+                bbox=GeoSpatialDataset.to_bbox(total_bounds, first_layer_data.data.crs),
             )
+            second_layer = second_layer.to_crs(first_layer_data.data.crs)
+            is_kept[is_kept] = DataGrid.intersects_layer(
+                cells=grid.geometry[is_kept], layer=second_layer.geometry
+            )
+
+            grid = grid[is_kept]
+            logger.debug(f"({len(grid)}) grid cells kept after masking...")
 
         if save_as_file:
-            gpd.GeoSeries(grid["geometry"]).boundary.plot(ax=ax)
-            fig.savefig(save_as_file + ".pdf")
             grid.to_file(save_as_file)
 
-        grid = grid.drop_duplicates()
+        if save_index_as_file:
+            n_rows, n_cols = DataGrid.get_fishnet_shape(
+                min_x=min_x, min_y=min_y, max_x=max_x, max_y=max_y, grid_size=grid_size
+            )
+            GridIndex.from_grid_ids(
+                grid_ids=grid["grid_id"].to_numpy(),
+                min_x=min_x,
+                min_y=min_y,
+                cell_size=grid_size,
+                n_rows=n_rows,
+                n_cols=n_cols,
+            ).save_data(save_index_as_file)
 
         return GeoSpatialDataset(data=grid)
+
+    @staticmethod
+    def plot_grid(
+        grid_data: GeoSpatialDataset,
+        first_layer_data: GeoSpatialDataset,
+        save_as_file: str,
+        second_layer_local_path: str = None,
+        max_cells: int = 20000,
+    ):
+        """
+        Render the grid over its layers and save the figure, for diagnostics only.
+
+        The figure is rendered on an Agg canvas, so it never opens a window and can
+        run on headless workers (geopandas still imports pyplot to draw). Grids
+        with more than `max_cells` cells are decimated: cells are drawn as their
+        centroids and the layers boundaries are simplified to the cell size.
+
+        Args:
+            grid_data (GeoSpatialDataset): The generated grid.
+            first_layer_data (GeoSpatialDataset): Geospatial data of the universe.
+            save_as_file (str): Path of the rendered figure.
+            second_layer_local_path (str, optional): Path to the second layer data. Defaults to None.
+            max_cells (int, optional): Number of cells above which the render is decimated. Defaults to 20000.
+        """
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        logger.debug(f"Plotting grid diagnostics to ({save_as_file})...")
+
+        grid = grid_data.data
+        first_layer = first_layer_data.data
+        is_decimated = len(grid) > max_cells
+
+        if is_decimated:
+            cell_bounds = grid.geometry.iloc[0].bounds
+            tolerance = cell_bounds[2] - cell_bounds[0]
+            logger.debug(
+                f"Grid has ({len(grid)}) cells, decimating render (max: {max_cells})..."
+            )
+
+        fig = Figure(figsize=(15, 15))
+        FigureCanvasAgg(fig)
+        ax = fig.subplots()
+
+        first_layer_boundary = first_layer.boundary
+        if is_decimated:
+            first_layer_boundary = first_layer_boundary.simplify(tolerance)
+        first_layer_boundary.plot(ax=ax, color="gray")
+
+        if second_layer_local_path:
+            second_layer = GeoSpatialDataset.read_file(
+                second_layer_local_path,
+                bbox=GeoSpatialDataset.to_bbox(
+                    first_layer.total_bounds, first_layer.crs
+                ),
+            )
+            second_layer = second_layer.to_crs(first_layer.crs)
+            second_layer_boundary = second_layer.clip(first_layer.total_bounds).boundary
+            if is_decimated:
+                second_layer_boundary = second_layer_boundary.simplify(tolerance)
+            second_layer_boundary.plot(ax=ax, color="red")
+
+        if is_decimated:
+            gpd.GeoSeries(shapely.centroid(np.asarray(grid.geometry))).plot(
+                ax=ax, markersize=0.1, rasterized=True
+            )
+        else:
+            grid.boundary.plot(ax=ax)
+
+        fig.savefig(save_as_file)
@@ -8,6 +8,7 @@ from data.prep.abstract_processor import DataProcessor
 from data.types.geospatial_dataset import GeoSpatialDataset
 from data.types.tabular_dataset import TabularDataset
 from utils.exceptions import InvalidOperation
+from utils.operations import aggregate_by, contains_by_label
 
 NOT_RELEVANT_FEATURES = [
     "SUITE_DEBUT",
@@ -25,6 +26,18 @@ NOT_RELEVANT_FEATURES = [
     "SUPERFICIE_BATIMENT",
     "NO_ARROND_ILE_CUM",
 ]
+# aggregated column: (curated column, reducer)
+AGGREGATIONS = {
+    "N_FLOOR_AVG": ("ETAGE_HORS", "mean"),
+    "N_LOGEMENT_SUM": ("NOMBRE_LOG", "sum"),
+    "N_BUILDINGS": ("ID_UEV", "nunique"),
+    "LAND_AREA_AVG": ("SUPERFICIE", "sum"),
+    "BUILD_TOT_AREA_AVG": ("SUPERFIC_1", "sum"),
+    "BUILDING_CONDOMINIUM_COUNT": ("IS_CONDOMINIUMS", "sum"),
+    "BUILDING_LOGEMENTS_COUNT": ("IS_LOGEMENT", "sum"),
+    "BUILDING_MIXED_COUNT": ("IS_MIXED", "sum"),
+    "BUILDING_OUTSIDE_COUNT": ("IS_OUTSIDE", "sum"),
+}
 logger = get_logger(__name__)
 
 
@@ -149,38 +162,21 @@ class DatasetPropertyAssessment(DataProcessor):
             labels=labels,
             right=False,
         )
-        # create bins for utilisation
-        self.curated_dataset.data["IS_CONDOMINIUMS"] = self.curated_dataset.data[
-            "LIBELLE_UT"
-        ].str.contains("logement", case=False, regex=True) & self.curated_dataset.data[
-            "CATEGORIE_"
-        ].str.contains(
-            "condominium", case=False, regex=True
+        # create bins for utilisation, each distinct label is only matched once
+        is_logement = contains_by_label(
+            self.curated_dataset.data["LIBELLE_UT"], "logement"
         )
-
-        self.curated_dataset.data["IS_LOGEMENT"] = (
-            self.curated_dataset.data["LIBELLE_UT"].str.contains(
-                "logement", case=False, regex=True
-            )
-            & ~self.curated_dataset.data["CATEGORIE_"].str.contains(
-                "condominium", case=False, regex=True
-            )
-            & ~self.curated_dataset.data["IS_CONDOMINIUMS"]
+        is_condominium = contains_by_label(
+            self.curated_dataset.data["CATEGORIE_"], "condominium"
         )
-
-        self.curated_dataset.data["IS_OUTSIDE"] = (
-            self.curated_dataset.data["LIBELLE_UT"].str.contains(
-                "parc|stationnement|non aménagé", case=False, regex=True
-            )
-            & ~self.curated_dataset.data["IS_CONDOMINIUMS"]
-            & ~self.curated_dataset.data["IS_LOGEMENT"]
+        is_outside = contains_by_label(
+            self.curated_dataset.data["LIBELLE_UT"], "parc|stationnement|non aménagé"
         )
 
-        self.curated_dataset.data["IS_MIXED"] = (
-            ~self.curated_dataset.data["IS_CONDOMINIUMS"]
-            & ~self.curated_dataset.data["IS_LOGEMENT"]
-            & ~self.curated_dataset.data["IS_OUTSIDE"]
-        )
+        self.curated_dataset.data["IS_CONDOMINIUMS"] = is_logement & is_condominium
+        self.curated_dataset.data["IS_LOGEMENT"] = is_logement & ~is_condominium
+        self.curated_dataset.data["IS_OUTSIDE"] = is_outside & ~is_logement
+        self.curated_dataset.data["IS_MIXED"] = ~is_logement & ~is_outside
 
         # clean and save data
         self.curated_dataset.data = self.curated_dataset.data.drop_duplicates()
@@ -197,51 +193,14 @@ class DatasetPropertyAssessment(DataProcessor):
         This method is not required for Crime Dataset.
         """
 
-        # Pivot the data to get Year Range values as columns
-        self.aggreated_dataset.data = (
-            self.curated_dataset.data.groupby(["grid_id", "ANNEE_CONS_CATEGORY"])
-            .size()
-            .unstack(fill_value=0)
+        # count the construction year ranges and aggregate in a single pass
+        self.aggreated_dataset.data = aggregate_by(
+            self.curated_dataset.data,
+            by="grid_id",
+            aggregations=AGGREGATIONS,
+            one_hot=["ANNEE_CONS_CATEGORY"],
         )
 
-        self.aggreated_dataset.data["N_FLOOR_AVG"] = self.curated_dataset.data.groupby(
-            "grid_id"
-        )["ETAGE_HORS"].mean()
-
-        self.aggreated_dataset.data[
-            "N_LOGEMENT_SUM"
-        ] = self.curated_dataset.data.groupby("grid_id")["NOMBRE_LOG"].sum()
-
-        self.aggreated_dataset.data["N_BUILDINGS"] = self.curated_dataset.data.groupby(
-            "grid_id"
-        )["ID_UEV"].nunique()
-
-        self.aggreated_dataset.data[
-            "LAND_AREA_AVG"
-        ] = self.curated_dataset.data.groupby("grid_id")["SUPERFICIE"].sum()
-
-        self.aggreated_dataset.data[
-            "BUILD_TOT_AREA_AVG"
-        ] = self.curated_dataset.data.groupby("grid_id")["SUPERFIC_1"].sum()
-
-        self.aggreated_dataset.data[
-            "BUILDING_CONDOMINIUM_COUNT"
-        ] = self.curated_dataset.data.groupby("grid_id")["IS_CONDOMINIUMS"].sum()
-
-        self.aggreated_dataset.data[
-            "BUILDING_LOGEMENTS_COUNT"
-        ] = self.curated_dataset.data.groupby("grid_id")["IS_LOGEMENT"].sum()
-
-        self.aggreated_dataset.data[
-            "BUILDING_MIXED_COUNT"
-        ] = self.curated_dataset.data.groupby("grid_id")["IS_MIXED"].sum()
-
-        self.aggreated_dataset.data[
-            "BUILDING_OUTSIDE_COUNT"
-        ] = self.curated_dataset.data.groupby("grid_id")["IS_OUTSIDE"].sum()
-
-        self.aggreated_dataset.data = self.aggreated_dataset.data.reset_index()
-
         self.aggreated_dataset.save_data(
             filepath=self.to_local_file_path(self.dataset_name)
         )
@@ -1,4 +1,7 @@
 import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
 
 import pandas as pd
 
@@ -8,9 +11,32 @@ from haversine import Unit
 from data.prep.abstract_processor import DataProcessor
 from data.types.geospatial_dataset import GeoSpatialDataset
 from data.types.tabular_dataset import TabularDataset
+from data.types.tax_roll_manifest import TaxRollManifest
+from utils.custom_file_io import get_cached_file_hash
+from utils.enums.intermediate_storages import IntermediateStorage
+from utils.enums.states import StateMachineStates
 from utils.exceptions import InvalidOperation
+from utils.operations import aggregate_by
 
-
+# property assessment features not required to clean the tax rolls
+NOT_REQUIRED_PROPERTY_FEATURES = [
+    "SUITE_DEBU",
+    "MUNICIPALI",
+    "ETAGE_HORS",
+    "NOMBRE_LOG",
+    "ANNEE_CONS",
+    "CODE_UTILI",
+    "LETTRE_DEB",
+    "LETTRE_FIN",
+    "LIBELLE_UT",
+    "CATEGORIE_",
+    "MATRICULE8",
+    "SUPERFIC_1",
+    "SUPERFICIE",
+    "NO_ARROND_",
+]
+# partition key of the transformed tax rolls
+BOROUGH_COLUMN = "BOROUGH"
 logger = get_logger(__name__)
 
 
@@ -19,6 +45,35 @@ class DatasetTaxRoll(DataProcessor):
     Class for processing crime dataset.
     """
 
+    source_columns = [
+        "ANNEE_EXERCICE",
+        "ID_CUM",
+        "AD_EMPLAC_CIV1",
+        "AD_EMPLAC_CIV2",
+        "AD_EMPLAC_GENER",
+        "AD_EMPLAC_RUE",
+        "AD_EMPLAC_ORIENT",
+        "AD_EMPLAC_SUITE1",
+        "AD_EMPLAC_SUITE2",
+        "CODE_DESCR_LONGUE",
+        "DESCR_LONGUE",
+        "VAL_IMPOSABLE",
+    ]
+    source_dtypes = {
+        "ANNEE_EXERCICE": int,
+        "ID_CUM": int,
+        "AD_EMPLAC_CIV1": str,
+        "AD_EMPLAC_CIV2": str,
+        "AD_EMPLAC_GENER": str,
+        "AD_EMPLAC_RUE": str,
+        "AD_EMPLAC_ORIENT": str,
+        "AD_EMPLAC_SUITE1": str,
+        "AD_EMPLAC_SUITE2": str,
+        "CODE_DESCR_LONGUE": str,
+        "DESCR_LONGUE": str,
+        "VAL_IMPOSABLE": float,
+    }
+
     def __init__(
         self,
         dataset_settings: dict,
@@ -29,6 +84,12 @@ class DatasetTaxRoll(DataProcessor):
         processed_sub_dir: str,
         processed_file_path: str,
         processed_file_name: str,
+        tax_year: int = 2023,
+        tax_code: str = "E00",
+        chunk_size: int = 100000,
+        max_workers: int = None,
+        intermediate_storage: IntermediateStorage = IntermediateStorage.MEMORY,
+        incremental: bool = False,
     ):
         """
         Initialize the Dataset PropertyAssessment.
@@ -38,6 +99,16 @@ class DatasetTaxRoll(DataProcessor):
             grid_distance: Distance for grid creation.
             grid_units: Units for grid creation.
             processed_file_name: The name of the processed property assessment file.
+            tax_year: Fiscal year of the taxes kept (default: 2023).
+            tax_code: Code of the taxes kept (default: "E00").
+            chunk_size: Number of rows of the tax rolls read at a time (default: 100000).
+            max_workers: Number of processes cleaning the tax rolls, one per CPU if
+                None, in the current process if 1 (default: None).
+            intermediate_storage: How the tax roll of each borough is kept, only in
+                memory, in its own file or as a partition of a single dataset saved
+                instead of the transformed file (default: MEMORY).
+            incremental: Whether to only reprocess the boroughs whose inputs changed
+                since the last run, requires the PARTITIONED storage (default: False).
         """
         super().__init__(
             grid_distance=grid_distance,
@@ -51,6 +122,21 @@ class DatasetTaxRoll(DataProcessor):
         self.aggregated_dataset = TabularDataset()
         self.pre_processed_data_path = processed_sub_dir, processed_file_name
         self.pre_processed_data = None
+        self.tax_year = tax_year
+        self.tax_code = tax_code
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.intermediate_storage = intermediate_storage
+        self.incremental = incremental
+        self.pre_processed_hash = None
+        self.borough_hashes = {}
+        self.changed_boroughs = set()
+        self.removed_boroughs = set()
+
+        if incremental and intermediate_storage != IntermediateStorage.PARTITIONED:
+            raise InvalidOperation(
+                "Incremental tax-roll refresh requires the partitioned storage."
+            )
 
     @property
     def settings(self):
@@ -60,6 +146,36 @@ class DatasetTaxRoll(DataProcessor):
     def dataset_name(self):
         return str("tax-rolls")
 
+    @property
+    def partitioned_data_path(self):
+        filepath = self.to_local_file_path(self.dataset_name)
+        root, extension = os.path.splitext(filepath)
+        return root + ".boroughs" + extension
+
+    @property
+    def manifest_path(self):
+        # the manifest is saved once the borough partials are aggregated
+        filepath = self.get_partitioned_data_path(StateMachineStates.STATE_AGGREGATION)
+        return os.path.splitext(filepath)[0] + ".manifest.json"
+
+    def get_partitioned_data_path(self, state: StateMachineStates) -> str:
+        """
+        Get the path of the partitioned dataset saved by a state.
+
+        Args:
+            state: The state saving the dataset.
+
+        Returns:
+            The path of the partitioned dataset.
+        """
+        filename = self.processed_file_path.format(
+            dataset_name=self.dataset_name,
+            grid_distance=str(self.grid_distance),
+            grid_units=str(self.grid_units.value),
+        )
+        root, extension = os.path.splitext(filename)
+        return os.path.join(self.root_dir, state.value, root + ".boroughs" + extension)
+
     @property
     def pre_processed_data_path(self):
         return self._curated_data_path
@@ -97,27 +213,16 @@ class DatasetTaxRoll(DataProcessor):
             )
 
         # this is to load the property assessment transformed data
-        self.pre_processed_data = pd.read_csv(self.pre_processed_data_path)
-
-        self.pre_processed_data = self.pre_processed_data.drop(
-            labels=[
-                "SUITE_DEBU",
-                "MUNICIPALI",
-                "ETAGE_HORS",
-                "NOMBRE_LOG",
-                "ANNEE_CONS",
-                "CODE_UTILI",
-                "LETTRE_DEB",
-                "LETTRE_FIN",
-                "LIBELLE_UT",
-                "CATEGORIE_",
-                "MATRICULE8",
-                "SUPERFIC_1",
-                "SUPERFICIE",
-                "NO_ARROND_",
-            ],
-            axis=1,
+        pre_processed_dataset = TabularDataset()
+        columns = [
+            column
+            for column in TabularDataset.get_columns(self.pre_processed_data_path)
+            if column not in NOT_REQUIRED_PROPERTY_FEATURES
+        ]
+        self.pre_processed_data = pre_processed_dataset.load_from_path(
+            self.pre_processed_data_path, columns=columns
         )
+        self.pre_processed_hash = pre_processed_dataset.ds_hash
 
     def data_transform(self):
         """
@@ -125,109 +230,340 @@ class DatasetTaxRoll(DataProcessor):
         This method is not required for Dataset.
         """
 
-        for key, value in self.settings.items():
-            logger.debug(f"Processing tax-rolls ({key.value})...")
-            curr_tax_roll = self.clean_tax_file(
-                key.value, value.get_local_working_file_path(), self.pre_processed_data
-            )
-            self.curated_dataset.data = pd.concat(
-                [self.curated_dataset.data, curr_tax_roll.data]
+        tasks = [
+            {
+                "tax_file_name": key.value,
+                "tax_file_path": value.get_local_working_file_path(),
+                "file_path": (
+                    self.to_local_file_path(str(key.value))
+                    if self.intermediate_storage == IntermediateStorage.FILES
+                    else None
+                ),
+                "add_borough": (
+                    self.intermediate_storage == IntermediateStorage.PARTITIONED
+                ),
+                "tax_year": self.tax_year,
+                "tax_code": self.tax_code,
+                "chunk_size": self.chunk_size,
+            }
+            for key, value in self.settings.items()
+        ]
+
+        if self.incremental:
+            self.borough_hashes = {
+                task["tax_file_name"]: get_cached_file_hash(task["tax_file_path"])
+                for task in tasks
+            }
+            if not self.find_changed_boroughs():
+                # partitions of a previous run cannot be trusted, all are rebuilt
+                remove_dataset(self.partitioned_data_path)
+                remove_dataset(
+                    self.get_partitioned_data_path(StateMachineStates.STATE_AGGREGATION)
+                )
+
+            tasks = [
+                task for task in tasks if task["tax_file_name"] in self.changed_boroughs
+            ]
+
+            # changed boroughs left without taxes must not keep their old partition
+            remove_partitions(
+                self.partitioned_data_path,
+                boroughs=self.changed_boroughs | self.removed_boroughs,
             )
+        else:
+            self.changed_boroughs = {task["tax_file_name"] for task in tasks}
 
-        self.curated_dataset.save_data(
-            filepath=self.to_local_file_path(self.dataset_name)
+        if not tasks:
+            self.curated_dataset.data = None
+            logger.info(f"No tax-roll changed, ({self.dataset_name}) is up-to-date...")
+            return
+
+        # boroughs are independent, the property assessment is sent once per worker
+        start = time.perf_counter()
+
+        if self.max_workers == 1:
+            _init_tax_roll_worker(self.pre_processed_data)
+            tax_rolls = [_clean_tax_file_worker(**task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_init_tax_roll_worker,
+                initargs=(self.pre_processed_data,),
+            ) as executor:
+                futures = [
+                    executor.submit(_clean_tax_file_worker, **task) for task in tasks
+                ]
+                tax_rolls = [future.result() for future in futures]
+
+        _init_tax_roll_worker(None)
+        logger.info(
+            f"({len(tasks)}) tax-rolls processed in "
+            f"({time.perf_counter() - start:0.2f}) seconds..."
         )
 
+        self.curated_dataset.data = pd.concat(tax_rolls)
+
+        if self.intermediate_storage == IntermediateStorage.PARTITIONED:
+            self.curated_dataset.save_data(
+                filepath=self.partitioned_data_path, partition_cols=[BOROUGH_COLUMN]
+            )
+        else:
+            self.curated_dataset.save_data(
+                filepath=self.to_local_file_path(self.dataset_name)
+            )
+
         logger.info(f"Transformed data for ({self.dataset_name}) successfully saved")
 
-    def clean_tax_file(
-        self,
-        tax_file_name: str,
-        tax_file_path: str,
-        unit_eval_grid: pd.DataFrame,
-        get_codes_count: bool = False,
-    ) -> TabularDataset:
-        # read file and assign proper types to data
-        tax_roll = pd.read_csv(
-            tax_file_path,
-            dtype={
-                "ARRONDISSEMENT": int,
-                "NOM_ARRONDISSEMENT": str,
-                "ANNEE_EXERCICE": int,
-                "ID_CUM": int,
-                "NO_COMPTE": str,
-                "AD_EMPLAC_CIV1": str,
-                "AD_EMPLAC_CIV2": str,
-                "AD_EMPLAC_GENER": str,
-                "AD_EMPLAC_RUE": str,
-                "AD_EMPLAC_ORIENT": str,
-                "AD_EMPLAC_SUITE1": str,
-                "AD_EMPLAC_SUITE2": str,
-                "CODE_DESCR_LONGUE": str,
-                "DESCR_LONGUE": str,
-                "VAL_IMPOSABLE": float,
-                "TAUX_IMPOSI": float,
-                "MONTANT_DETAIL": float,
-            },
-        )
+    def find_changed_boroughs(self) -> bool:
+        """
+        Compare the inputs of the tax rolls with the ones of the last run, and find
+        the boroughs to reprocess and the ones no longer configured.
+
+        Returns:
+            Whether the partitions of the last run can be reused, otherwise every
+            borough is reprocessed.
+        """
+        manifest = None
+        if os.path.exists(self.manifest_path):
+            manifest = TaxRollManifest.from_json_path(self.manifest_path)
 
-        # for debugging, count code types
-        if get_codes_count:
-            tax_codes_grouped = (
-                tax_roll.groupby(["CODE_DESCR_LONGUE", "DESCR_LONGUE"])["ID_CUM"]
-                .count()
-                .reset_index()
+        is_reusable = (
+            manifest is not None
+            and manifest.property_assessment_hash == self.pre_processed_hash
+            and manifest.tax_year == self.tax_year
+            and manifest.tax_code == self.tax_code
+            and os.path.exists(self.partitioned_data_path)
+            and os.path.exists(
+                self.get_partitioned_data_path(StateMachineStates.STATE_AGGREGATION)
             )
-            print(tax_codes_grouped)
-
-        # only get required codes
-        tax_roll = tax_roll.loc[tax_roll["CODE_DESCR_LONGUE"] == "E00"]
-        tax_roll = tax_roll.loc[tax_roll["ANNEE_EXERCICE"] == 2023]
-
-        # drop data not required
-        tax_roll = tax_roll.drop(
-            labels=[
-                "ARRONDISSEMENT",
-                "NO_COMPTE",
-                "NOM_ARRONDISSEMENT",
-                "TAUX_IMPOSI",
-                "MONTANT_DETAIL",
-                "ANNEE_EXERCICE",
-            ],
-            axis=1,
         )
 
-        # merge with grid
-        local_tax_roll = TabularDataset()
-        local_tax_roll.data = tax_roll.merge(
-            unit_eval_grid, left_on="ID_CUM", right_on="ID_UEV"
+        if not is_reusable:
+            self.changed_boroughs = set(self.borough_hashes)
+            self.removed_boroughs = set()
+        else:
+            self.changed_boroughs = {
+                borough
+                for borough, borough_hash in self.borough_hashes.items()
+                if manifest.borough_hashes.get(borough) != borough_hash
+            }
+            self.removed_boroughs = set(manifest.borough_hashes) - set(
+                self.borough_hashes
+            )
+
+        logger.info(
+            f"({len(self.changed_boroughs)}) of ({len(self.borough_hashes)}) "
+            f"tax-rolls changed, ({len(self.removed_boroughs)}) removed..."
         )
 
-        local_tax_roll.save_data(filepath=self.to_local_file_path(str(tax_file_name)))
+        return is_reusable
+
+    def load_boroughs(self, boroughs: list = None) -> pd.DataFrame:
+        """
+        Load the transformed tax rolls of some boroughs from the partitioned dataset,
+        only reading their partitions.
+
+        Args:
+            boroughs: Names of the boroughs to read, all of them if None.
+
+        Returns:
+            The transformed tax rolls of the boroughs.
+        """
+        filters = None
+        if boroughs is not None:
+            filters = [(BOROUGH_COLUMN, "in", list(boroughs))]
 
-        return local_tax_roll
+        return TabularDataset().load_from_path(
+            self.get_partitioned_data_path(StateMachineStates.STATE_TRANSFORMATION),
+            filters=filters,
+        )
 
     def data_aggregate(self):
         """
         Aggregate the data.
         """
-        # aggregate tax rolls by grid id
-        self.aggregated_dataset.data = (
-            self.curated_dataset.data.groupby("grid_id")
-            .VAL_IMPOSABLE.agg(["sum", "mean", "count"])
-            .reset_index(drop=False)
-            .rename(
-                columns={
-                    "sum": "EVAL_SUM",
-                    "mean": "EVAL_MEAN",
-                    "count": "NB_TAX_PARCELS",
-                }
+        if self.incremental:
+            self.aggregated_dataset.data = self.aggregate_boroughs()
+        else:
+            # aggregate tax rolls by grid id
+            self.aggregated_dataset.data = aggregate_by(
+                self.curated_dataset.data,
+                by="grid_id",
+                aggregations={
+                    "EVAL_SUM": ("VAL_IMPOSABLE", "sum"),
+                    "EVAL_MEAN": ("VAL_IMPOSABLE", "mean"),
+                    "NB_TAX_PARCELS": ("VAL_IMPOSABLE", "count"),
+                },
             )
-        )
 
         # save aggregated data
         self.aggregated_dataset.save_data(
             filepath=self.to_local_file_path(self.dataset_name)
         )
 
+        if self.incremental:
+            TaxRollManifest(
+                property_assessment_hash=self.pre_processed_hash,
+                tax_year=self.tax_year,
+                tax_code=self.tax_code,
+                borough_hashes=self.borough_hashes,
+                updated_at=time.time(),
+            ).save_data(self.manifest_path)
+
         logger.info(f"Aggregated data for ({self.dataset_name}) successfully saved")
+
+    def aggregate_boroughs(self) -> pd.DataFrame:
+        """
+        Update the sum and count of the changed boroughs by grid id, and merge the
+        ones of every borough.
+
+        Returns:
+            The tax rolls aggregated by grid id.
+        """
+        partials_path = self.partitioned_data_path
+        remove_partitions(
+            partials_path, boroughs=self.changed_boroughs | self.removed_boroughs
+        )
+
+        # only the partitions of the changed boroughs are read back
+        changed_data = None
+        if self.changed_boroughs and os.path.exists(
+            self.get_partitioned_data_path(StateMachineStates.STATE_TRANSFORMATION)
+        ):
+            changed_data = self.load_boroughs(sorted(self.changed_boroughs))
+
+        if changed_data is not None and len(changed_data):
+            partials = TabularDataset()
+            partials.data = aggregate_by(
+                changed_data,
+                by=[BOROUGH_COLUMN, "grid_id"],
+                aggregations={
+                    "sum": ("VAL_IMPOSABLE", "sum"),
+                    "count": ("VAL_IMPOSABLE", "count"),
+                },
+            )
+            partials.save_data(filepath=partials_path, partition_cols=[BOROUGH_COLUMN])
+
+        # sums and counts are merged, the mean is derived from them
+        aggregated_data = (
+            TabularDataset()
+            .load_from_path(partials_path, columns=["grid_id", "sum", "count"])
+            .groupby("grid_id")[["sum", "count"]]
+            .sum()
+            .reset_index(drop=False)
+        )
+        aggregated_data["mean"] = aggregated_data["sum"] / aggregated_data["count"]
+
+        return aggregated_data[["grid_id", "sum", "mean", "count"]].rename(
+            columns={
+                "sum": "EVAL_SUM",
+                "mean": "EVAL_MEAN",
+                "count": "NB_TAX_PARCELS",
+            }
+        )
+
+
+def remove_dataset(dataset_path: str):
+    """
+    Remove a partitioned dataset with all its partitions.
+
+    Args:
+        dataset_path: Path of the partitioned dataset.
+    """
+    if os.path.exists(dataset_path):
+        shutil.rmtree(dataset_path)
+        logger.debug(f"Dataset ({dataset_path}) removed...")
+
+
+def remove_partitions(dataset_path: str, boroughs: set):
+    """
+    Remove the partitions of some boroughs from a partitioned dataset.
+
+    Args:
+        dataset_path: Path of the partitioned dataset.
+        boroughs: Names of the boroughs to remove.
+    """
+    for borough in boroughs:
+        partition_path = os.path.join(dataset_path, f"{BOROUGH_COLUMN}={borough}")
+
+        if os.path.exists(partition_path):
+            shutil.rmtree(partition_path)
+            logger.debug(f"Partition ({partition_path}) removed...")
+
+
+# property assessment frame, shared read-only with the worker processes
+_unit_eval_grid = None
+
+
+def _init_tax_roll_worker(unit_eval_grid: pd.DataFrame):
+    global _unit_eval_grid
+    _unit_eval_grid = unit_eval_grid
+
+
+def _clean_tax_file_worker(
+    tax_file_name: str,
+    tax_file_path: str,
+    file_path: str = None,
+    add_borough: bool = False,
+    **kwargs,
+) -> pd.DataFrame:
+    logger.debug(f"Processing tax-rolls ({tax_file_name})...")
+
+    local_tax_roll = TabularDataset()
+    local_tax_roll.data = clean_tax_file(
+        tax_file_path=tax_file_path, unit_eval_grid=_unit_eval_grid, **kwargs
+    )
+
+    if add_borough:
+        local_tax_roll.data[BOROUGH_COLUMN] = tax_file_name
+
+    if file_path:
+        local_tax_roll.save_data(filepath=file_path)
+
+    return local_tax_roll.data
+
+
+def clean_tax_file(
+    tax_file_path: str,
+    unit_eval_grid: pd.DataFrame,
+    tax_year: int,
+    tax_code: str,
+    chunk_size: int,
+) -> pd.DataFrame:
+    """
+    Read a borough tax roll by chunks, keeping the required taxes, and locate them
+    in the grid.
+
+    Args:
+        tax_file_path: Path of the borough tax roll.
+        unit_eval_grid: Property assessment units with their grid id.
+        tax_year: Fiscal year of the taxes kept.
+        tax_code: Code of the taxes kept.
+        chunk_size: Number of rows read at a time.
+
+    Returns:
+        The taxes kept, merged with their property assessment unit.
+    """
+    # read file by chunks, only keeping the required codes
+    tax_roll_chunks = []
+
+    for chunk in pd.read_csv(
+        tax_file_path,
+        usecols=DatasetTaxRoll.source_columns,
+        dtype=DatasetTaxRoll.source_dtypes,
+        chunksize=chunk_size,
+    ):
+        tax_roll_chunks.append(
+            chunk.loc[
+                (chunk["CODE_DESCR_LONGUE"] == tax_code)
+                & (chunk["ANNEE_EXERCICE"] == tax_year)
+            ]
+        )
+
+    tax_roll = pd.concat(tax_roll_chunks)
+
+    # drop data not required
+    tax_roll = tax_roll.drop(labels=["ANNEE_EXERCICE"], axis=1)
+
+    # merge with grid
+    return tax_roll.merge(unit_eval_grid, left_on="ID_CUM", right_on="ID_UEV")
@@ -1,13 +1,27 @@
-import hashlib
 import os
 import config.logs as logs
 import geopandas as gpd
+import shapely
 
 from data.types.abstract_serealizable import Serializable
+from utils.custom_file_io import get_cached_file_hash, get_storage_format
+from utils.enums.storage_formats import StorageFormat
 from utils.exceptions import InvalidOperation
 
 logger = logs.get_logger(__name__)
 
+# the arrow-based reader needs both pyogrio and pyarrow
+try:
+    import pyarrow  # noqa: F401
+    import pyogrio  # noqa: F401
+
+    ARROW_READS = True
+except ImportError:
+    ARROW_READS = False
+
+# vertices added to each side of a bounding box before reprojecting it
+BBOX_DENSIFY_VERTICES = 100
+
 
 class GeoSpatialDataset(Serializable):
     """Class that references the scoring set and the reference (training) set.
@@ -16,11 +30,18 @@ class GeoSpatialDataset(Serializable):
     Attributes:
         data: The dataset represented as a pandas dataframe.
         _ds_hash: hash of the dataset.
+        storage_format: format of the saved files, inferred from the file path if None.
     """
 
-    def __init__(self, data: gpd = None, ds_hash: str = None):
+    def __init__(
+        self,
+        data: gpd = None,
+        ds_hash: str = None,
+        storage_format: StorageFormat = None,
+    ):
         self.data = data
         self._ds_hash = ds_hash
+        self.storage_format = storage_format
 
     @property
     def ds_hash(self):
@@ -30,33 +51,111 @@ class GeoSpatialDataset(Serializable):
     def ds_hash(self, new_ds_hash):
         self._ds_hash = new_ds_hash
 
-    def load_from_path(self, local_path: str) -> gpd:
+    def load_from_path(
+        self,
+        local_path: str,
+        columns: list = None,
+        dtype: dict = None,
+        bbox: gpd.GeoSeries = None,
+    ) -> gpd:
         """Method to load an object from the file path and returning a DataFrame.
 
         Args:
             local_path:
+            columns: columns to read besides the geometry, all of them if None.
+            dtype: dtypes of the columns, inferred if None.
+            bbox: only read the features intersecting this area, all of them if None.
 
         Returns:
             Dataset as Geospatial data
         """
         if os.path.exists(local_path):
-            # read file contents
-            with open(local_path, "rb") as j:
-                data = j.read()
-
-            gpd_hash = hashlib.md5(data).hexdigest()
-            gpd_data = gpd.read_file(local_path)
+            gpd_hash = get_cached_file_hash(local_path)
+
+            if get_storage_format(local_path) == StorageFormat.PARQUET:
+                if columns is not None:
+                    columns = [*columns, "geometry"]
+                gpd_data = gpd.read_parquet(local_path, columns=columns)
+                if bbox is not None:
+                    min_x, min_y, max_x, max_y = bbox.to_crs(gpd_data.crs).total_bounds
+                    gpd_data = gpd_data.cx[min_x:max_x, min_y:max_y]
+            else:
+                gpd_data = GeoSpatialDataset.read_file(
+                    local_path, columns=columns, bbox=bbox
+                )
+
+            if dtype:
+                gpd_data = gpd_data.astype(dtype, copy=False)
         else:
             raise FileNotFoundError(f"Impossible to read file {local_path}")
 
-        self.data = gpd_data.copy()
+        # the dataset and the caller share the same frame
+        self.data = gpd_data
         self._ds_hash = gpd_hash
         return gpd_data
 
+    @staticmethod
+    def read_file(
+        local_path: str, columns: list = None, bbox: gpd.GeoSeries = None
+    ) -> gpd.GeoDataFrame:
+        """Method to read a shapefile or GeoJSON file, with the arrow-based reader when
+        it is available.
+
+        Args:
+            local_path: path of the file.
+            columns: columns to read besides the geometry, all of them if None.
+            bbox: only read the features intersecting this area, all of them if None.
+
+        Returns:
+            The file contents
+        """
+        if ARROW_READS:
+            try:
+                return gpd.read_file(
+                    local_path,
+                    columns=columns,
+                    bbox=bbox,
+                    engine="pyogrio",
+                    use_arrow=True,
+                )
+            except RuntimeError as error:
+                # GDAL builds older than 3.6 cannot read to arrow
+                logger.debug(f"Arrow read of ({local_path}) failed ({error})...")
+
+        return gpd.read_file(local_path, columns=columns, bbox=bbox)
+
+    @staticmethod
+    def to_bbox(bounds: tuple, crs) -> gpd.GeoSeries:
+        """Method to build a bounding box filter that can be reprojected to the CRS of
+        the file being read.
+
+        Args:
+            bounds: (min_x, min_y, max_x, max_y) of the box.
+            crs: CRS of the bounds.
+
+        Returns:
+            The bounding box
+        """
+        min_x, min_y, max_x, max_y = bounds
+        box = shapely.box(min_x, min_y, max_x, max_y)
+
+        # the sides of the box are curved once reprojected
+        max_segment_length = max(max_x - min_x, max_y - min_y) / BBOX_DENSIFY_VERTICES
+        box = shapely.segmentize(box, max_segment_length)
+
+        return gpd.GeoSeries([box], crs=crs)
+
     def save_data(self, filepath: str):
         logger.debug(f"Saving data to ({filepath})")
 
-        self.data.to_file(filepath, driver="GeoJSON")
+        storage_format = self.storage_format or get_storage_format(
+            filepath, default=StorageFormat.GEOJSON
+        )
+
+        if storage_format == StorageFormat.PARQUET:
+            self.data.to_parquet(filepath, index=False)
+        else:
+            self.data.to_file(filepath, driver="GeoJSON")
 
     def to_dict(self) -> dict:
         return {"ds_hash": self._ds_hash}
@@ -0,0 +1,152 @@
+import os
+
+import numpy as np
+import config.logs as logs
+
+from data.types.abstract_serealizable import Serializable
+
+logger = logs.get_logger(__name__)
+
+
+class GridIndex(Serializable):
+    """Class that locates points in a regular grid by arithmetic.
+
+    The cell of a point is floor((x - min_x) / cell_size), floor((y - min_y) / cell_size),
+    points on the edge between two cells are assigned to the upper/right one.
+
+    Attributes:
+        min_x: x coordinate of the grid origin.
+        min_y: y coordinate of the grid origin.
+        cell_size: size of a grid cell.
+        n_rows: number of rows of the fishnet.
+        n_cols: number of columns of the fishnet.
+        lookup: (n_rows, n_cols) array of grid ids, -1 for the cells that were not kept.
+    """
+
+    def __init__(
+        self,
+        min_x: float = None,
+        min_y: float = None,
+        cell_size: float = None,
+        n_rows: int = None,
+        n_cols: int = None,
+        lookup: np.ndarray = None,
+    ):
+        self.min_x = min_x
+        self.min_y = min_y
+        self.cell_size = cell_size
+        self.n_rows = n_rows
+        self.n_cols = n_cols
+        self.lookup = lookup
+
+    @classmethod
+    def from_grid_ids(
+        cls,
+        grid_ids: np.ndarray,
+        min_x: float,
+        min_y: float,
+        cell_size: float,
+        n_rows: int,
+        n_cols: int,
+    ):
+        """
+        Build the index of a fishnet from the ids of the cells that were kept.
+
+        Args:
+            grid_ids: Ids of the kept cells, numbered row by row.
+            min_x: x coordinate of the grid origin.
+            min_y: y coordinate of the grid origin.
+            cell_size: Size of a grid cell.
+            n_rows: Number of rows of the fishnet.
+            n_cols: Number of columns of the fishnet.
+
+        Returns:
+            GridIndex: The grid index.
+        """
+        lookup = np.full(n_rows * n_cols, -1, dtype=np.int64)
+        lookup[grid_ids] = grid_ids
+
+        return GridIndex(
+            min_x=min_x,
+            min_y=min_y,
+            cell_size=cell_size,
+            n_rows=n_rows,
+            n_cols=n_cols,
+            lookup=lookup.reshape(n_rows, n_cols),
+        )
+
+    def locate(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """
+        Get the grid id of each point.
+
+        Args:
+            x: x coordinates of the points.
+            y: y coordinates of the points.
+
+        Returns:
+            np.ndarray: The grid id of each point, -1 if the point is outside the grid.
+        """
+        with np.errstate(invalid="ignore"):
+            cols = np.floor((np.asarray(x) - self.min_x) / self.cell_size)
+            rows = np.floor((np.asarray(y) - self.min_y) / self.cell_size)
+
+        # NaN coordinates are out of bounds too
+        is_inside = (
+            (rows >= 0) & (rows < self.n_rows) & (cols >= 0) & (cols < self.n_cols)
+        )
+
+        grid_ids = np.full(len(rows), -1, dtype=np.int64)
+        grid_ids[is_inside] = self.lookup[
+            rows[is_inside].astype(np.int64), cols[is_inside].astype(np.int64)
+        ]
+
+        return grid_ids
+
+    def load_from_path(self, local_path: str):
+        """Method to load the grid index from the file path.
+
+        Args:
+            local_path: path of the index file.
+
+        Returns:
+            The grid index
+        """
+        if not os.path.exists(local_path):
+            raise FileNotFoundError(f"Impossible to read file {local_path}")
+
+        with np.load(local_path) as index_file:
+            self.min_x, self.min_y, self.cell_size = index_file["origin"]
+            self.n_rows, self.n_cols = index_file["lookup"].shape
+            self.lookup = index_file["lookup"]
+
+        return self
+
+    def save_data(self, filepath: str):
+        logger.debug(f"Saving grid index to ({filepath})")
+
+        # keep the file name as given, numpy appends '.npz' otherwise
+        with open(filepath, "wb") as index_file:
+            np.savez(
+                index_file,
+                origin=np.array([self.min_x, self.min_y, self.cell_size]),
+                lookup=self.lookup,
+            )
+
+    def to_dict(self) -> dict:
+        return {
+            "min_x": self.min_x,
+            "min_y": self.min_y,
+            "cell_size": self.cell_size,
+            "n_rows": self.n_rows,
+            "n_cols": self.n_cols,
+        }
+
+    @classmethod
+    def from_dict(cls, dictionary: dict):
+        return GridIndex(
+            min_x=dictionary["min_x"],
+            min_y=dictionary["min_y"],
+            cell_size=dictionary["cell_size"],
+            n_rows=dictionary["n_rows"],
+            n_cols=dictionary["n_cols"],
+        )
@@ -0,0 +1,70 @@
+import config.logs as logs
+
+from data.types.abstract_serealizable import Serializable
+
+logger = logs.get_logger(__name__)
+
+
+class GridManifest(Serializable):
+    """Class that describes how a cached grid artifact was generated.
+
+    Attributes:
+        cache_key: key combining the layers hashes and the grid parameters.
+        distance: grid measure.
+        units: grid measure units.
+        expand_data: whether the grid row, column and name were kept.
+        first_layer_hash: hash of the first layer file.
+        second_layer_hash: hash of the second layer file.
+        created_at: timestamp of the grid generation.
+        last_used_at: timestamp of the last time the grid was reused.
+    """
+
+    def __init__(
+        self,
+        cache_key: str,
+        distance: float,
+        units: str,
+        expand_data: bool,
+        first_layer_hash: str,
+        second_layer_hash: str = None,
+        created_at: float = None,
+        last_used_at: float = None,
+    ):
+        self.cache_key = cache_key
+        self.distance = distance
+        self.units = units
+        self.expand_data = expand_data
+        self.first_layer_hash = first_layer_hash
+        self.second_layer_hash = second_layer_hash
+        self.created_at = created_at
+        self.last_used_at = last_used_at
+
+    def save_data(self, filepath: str):
+        logger.debug(f"Saving grid manifest to ({filepath})")
+
+        self.export_json(filepath)
+
+    def to_dict(self) -> dict:
+        return {
+            "cache_key": self.cache_key,
+            "distance": self.distance,
+            "units": self.units,
+            "expand_data": self.expand_data,
+            "first_layer_hash": self.first_layer_hash,
+            "second_layer_hash": self.second_layer_hash,
+            "created_at": self.created_at,
+            "last_used_at": self.last_used_at,
+        }
+
+    @classmethod
+    def from_dict(cls, dictionary: dict):
+        return GridManifest(
+            cache_key=dictionary["cache_key"],
+            distance=dictionary["distance"],
+            units=dictionary["units"],
+            expand_data=dictionary["expand_data"],
+            first_layer_hash=dictionary["first_layer_hash"],
+            second_layer_hash=dictionary.get("second_layer_hash"),
+            created_at=dictionary.get("created_at"),
+            last_used_at=dictionary.get("last_used_at"),
+        )
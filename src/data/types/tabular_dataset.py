@@ -1,9 +1,11 @@
-import hashlib
 import os
 
 import pandas as pd
+import pyarrow.parquet as pq
 import config.logs as logs
 from data.types.abstract_serealizable import Serializable
+from utils.custom_file_io import get_cached_file_hash, get_storage_format
+from utils.enums.storage_formats import StorageFormat
 from utils.exceptions import InvalidOperation
 
 logger = logs.get_logger(__name__)
@@ -16,11 +18,18 @@ class TabularDataset(Serializable):
     Attributes:
         data: The dataset represented as a pandas dataframe.
         _ds_hash: hash of the dataset.
+        storage_format: format of the saved files, inferred from the file path if None.
     """
 
-    def __init__(self, data: pd.DataFrame = None, ds_hash: str = None):
+    def __init__(
+        self,
+        data: pd.DataFrame = None,
+        ds_hash: str = None,
+        storage_format: StorageFormat = None,
+    ):
         self.data = data
         self._ds_hash = ds_hash
+        self.storage_format = storage_format
 
     @property
     def ds_hash(self):
@@ -30,36 +39,82 @@ class TabularDataset(Serializable):
     def ds_hash(self, new_ds_hash):
         self._ds_hash = new_ds_hash
 
-    def load_from_path(self, local_path: str) -> pd.DataFrame:
+    def load_from_path(
+        self,
+        local_path: str,
+        columns: list = None,
+        dtype: dict = None,
+        filters: list = None,
+    ) -> pd.DataFrame:
         """Method to load an object from the file path and returning a DataFrame.
 
         Args:
-            local_path:
+            local_path: path of the file, or of the directory of a partitioned dataset.
+            columns: columns to read, all of them if None.
+            dtype: dtypes of the columns, inferred if None.
+            filters: parquet filters selecting the partitions read, all of them if None.
 
         Returns:
             Dataset as Geospatial data
         """
         if os.path.exists(local_path):
-            # read file contents
-            with open(local_path, "rb") as j:
-                data = j.read()
-
-            pd_hash = hashlib.md5(data).hexdigest()
-            pd_data = pd.read_csv(local_path)
+            # partitioned datasets are directories, they are not hashed
+            pd_hash = None
+            if os.path.isfile(local_path):
+                pd_hash = get_cached_file_hash(local_path)
+
+            if get_storage_format(local_path) == StorageFormat.PARQUET:
+                pd_data = pd.read_parquet(local_path, columns=columns, filters=filters)
+                if dtype:
+                    pd_data = pd_data.astype(dtype, copy=False)
+            else:
+                pd_data = pd.read_csv(local_path, usecols=columns, dtype=dtype)
         else:
             raise FileNotFoundError(f"Impossible to read file {local_path}")
 
-        self.data = pd_data.copy()
+        # the dataset and the caller share the same frame
+        self.data = pd_data
         self._ds_hash = pd_hash
         return pd_data
 
-    def save_data(self, filepath: str):
+    def save_data(self, filepath: str, partition_cols: list = None):
         logger.debug(f"Saving data to ({filepath})")
 
         if "geometry" in self.data.columns:
             self.data = self.data.drop("geometry", axis=1)
 
-        self.data.to_csv(filepath, index=False)
+        storage_format = self.storage_format or get_storage_format(filepath)
+
+        if storage_format == StorageFormat.PARQUET and partition_cols:
+            # only the partitions being written are replaced
+            self.data.to_parquet(
+                filepath,
+                index=False,
+                partition_cols=partition_cols,
+                existing_data_behavior="delete_matching",
+            )
+        elif storage_format == StorageFormat.PARQUET:
+            self.data.to_parquet(filepath, index=False)
+        else:
+            self.data.to_csv(filepath, index=False)
+
+    @staticmethod
+    def get_columns(local_path: str) -> list:
+        """Method to read the column names of a file without loading its data.
+
+        Args:
+            local_path: path of the file.
+
+        Returns:
+            The column names
+        """
+        if not os.path.exists(local_path):
+            raise FileNotFoundError(f"Impossible to read file {local_path}")
+
+        if get_storage_format(local_path) == StorageFormat.PARQUET:
+            return pq.read_schema(local_path).names
+
+        return pd.read_csv(local_path, nrows=0).columns.tolist()
 
     def to_dict(self) -> dict:
         return {"ds_hash": self._ds_hash}
@@ -0,0 +1,55 @@
+import config.logs as logs
+
+from data.types.abstract_serealizable import Serializable
+
+logger = logs.get_logger(__name__)
+
+
+class TaxRollManifest(Serializable):
+    """Class that describes the inputs of the processed tax rolls.
+
+    Attributes:
+        property_assessment_hash: hash of the property assessment join input.
+        tax_year: fiscal year of the taxes kept.
+        tax_code: code of the taxes kept.
+        borough_hashes: hash of the tax roll of each borough, by borough.
+        updated_at: timestamp of the last refresh.
+    """
+
+    def __init__(
+        self,
+        property_assessment_hash: str,
+        tax_year: int,
+        tax_code: str,
+        borough_hashes: dict,
+        updated_at: float = None,
+    ):
+        self.property_assessment_hash = property_assessment_hash
+        self.tax_year = tax_year
+        self.tax_code = tax_code
+        self.borough_hashes = borough_hashes
+        self.updated_at = updated_at
+
+    def save_data(self, filepath: str):
+        logger.debug(f"Saving tax roll manifest to ({filepath})")
+
+        self.export_json(filepath)
+
+    def to_dict(self) -> dict:
+        return {
+            "property_assessment_hash": self.property_assessment_hash,
+            "tax_year": self.tax_year,
+            "tax_code": self.tax_code,
+            "borough_hashes": self.borough_hashes,
+            "updated_at": self.updated_at,
+        }
+
+    @classmethod
+    def from_dict(cls, dictionary: dict):
+        return TaxRollManifest(
+            property_assessment_hash=dictionary["property_assessment_hash"],
+            tax_year=dictionary["tax_year"],
+            tax_code=dictionary["tax_code"],
+            borough_hashes=dictionary["borough_hashes"],
+            updated_at=dictionary.get("updated_at"),
+        )
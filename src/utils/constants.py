@@ -2,3 +2,6 @@ from utils.columns import LONG_COL, LAT_COL
 
 # montreal coords
 mtl = {LAT_COL: 45.508888, LONG_COL: -73.561668}
+
+# montreal agglomeration bounds (min_x, min_y, max_x, max_y)
+mtl_bounds = (-73.98, 45.40, -73.47, 45.71)
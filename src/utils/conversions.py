@@ -1,4 +1,16 @@
 from datetime import time
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+# shifts start at these times of day, the last one wrapping past midnight
+SHIFT_BOUNDARIES = [
+    time(hour=0, minute=1),
+    time(hour=8, minute=1),
+    time(hour=16, minute=1),
+]
+SHIFT_LABELS = ["soir", "nuit", "jour", "soir"]
 
 
 def time_to_category(time_of_day: time) -> str:
@@ -23,3 +35,79 @@ def time_to_category(time_of_day: time) -> str:
 
     # return category mapped
     return shift_category
+
+
+def time_to_microseconds(time_of_day: time) -> int:
+    return (
+        (time_of_day.hour * 60 + time_of_day.minute) * 60 + time_of_day.second
+    ) * 1_000_000 + time_of_day.microsecond
+
+
+def to_microseconds_of_day(date_times: pd.Series) -> np.ndarray:
+    """
+    Time of day of each date, as integer microseconds since midnight.
+
+    Args:
+        date_times (pd.Series): Dates to convert, timezone aware or not.
+
+    Returns:
+        np.ndarray: Microseconds since midnight of each date, -1 for missing dates.
+    """
+    accessor = date_times.dt
+    is_missing = date_times.isna().to_numpy()
+
+    # wall clock fields, valid for timezone aware dates too
+    microseconds = (
+        (
+            accessor.hour.to_numpy(dtype="int64", na_value=0) * 60
+            + accessor.minute.to_numpy(dtype="int64", na_value=0)
+        )
+        * 60
+        + accessor.second.to_numpy(dtype="int64", na_value=0)
+    ) * 1_000_000 + accessor.microsecond.to_numpy(dtype="int64", na_value=0)
+
+    return np.where(is_missing, -1, microseconds)
+
+
+def times_to_categories(
+    date_times: pd.Series,
+    boundaries: List[time] = None,
+    labels: List[str] = None,
+) -> pd.Series:
+    """
+    Vectorized time_to_category, binning the time of day of each date.
+
+    Args:
+        date_times (pd.Series): Dates to classify.
+        boundaries (List[time], optional): Sorted start times of the bins following
+            the first one, starting at midnight. Defaults to SHIFT_BOUNDARIES.
+        labels (List[str], optional): Label of each bin, one more than the boundaries
+            and possibly repeated. Defaults to SHIFT_LABELS.
+
+    Returns:
+        pd.Series: Categorical labels aligned on the dates, NaN for missing dates.
+    """
+    boundaries = SHIFT_BOUNDARIES if boundaries is None else boundaries
+    labels = SHIFT_LABELS if labels is None else labels
+
+    if len(labels) != len(boundaries) + 1:
+        raise ValueError(
+            f"Expected ({len(boundaries) + 1}) labels for ({len(boundaries)}) boundaries, got ({len(labels)})!"
+        )
+
+    limits = np.array([time_to_microseconds(b) for b in boundaries], dtype="int64")
+    if np.any(np.diff(limits) <= 0):
+        raise ValueError(f"Boundaries '{boundaries}' must be strictly increasing!")
+
+    # a bin label is shared by every bin it names
+    label_codes, categories = pd.factorize(pd.Series(labels))
+
+    microseconds = to_microseconds_of_day(date_times)
+    bins = np.searchsorted(limits, microseconds, side="right")
+    codes = np.where(microseconds >= 0, label_codes[bins], -1)
+
+    return pd.Series(
+        pd.Categorical.from_codes(codes, categories=categories),
+        index=date_times.index,
+        name=date_times.name,
+    )
@@ -1,4 +1,10 @@
+import hashlib
 import os
+import threading
+
+from utils.enums.storage_formats import StorageFormat
+
+CHUNK_SIZE = 1024 * 1024  # 1024 BYTES * 1024 KILOBYTES = 1MB
 
 
 def get_absolute_path(parent_dir_path: str, sub_dir_path: str) -> str:
@@ -25,3 +31,77 @@ def override_local_paths(dictionary: dict, root_dir: str):
         csv_path = os.path.join(root_dir, os.path.basename(dictionary["csv"]))
 
     return {"shp": shp_path, "geojson": geojson_path, "csv": csv_path}
+
+
+def get_file_hash(file_path: str, chunk_size: int = CHUNK_SIZE) -> str:
+    """
+    Compute the md5 hash of a file, reading it in fixed-size chunks.
+
+    Args:
+        file_path (str): Path of the file to hash.
+        chunk_size (int, optional): Number of bytes read at a time. Defaults to 1MB.
+
+    Returns:
+        str: The hexadecimal md5 digest of the file contents.
+    """
+    file_hash = hashlib.md5()
+
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            file_hash.update(chunk)
+
+    return file_hash.hexdigest()
+
+
+# hashes of the files already read, keyed by path, size and modification time
+_file_hashes = {}
+_file_hashes_lock = threading.Lock()
+
+
+def get_cached_file_hash(file_path: str, chunk_size: int = CHUNK_SIZE) -> str:
+    """
+    Compute the md5 hash of a file, reusing the last hash computed for it while its
+    size and modification time are unchanged.
+
+    Args:
+        file_path (str): Path of the file to hash.
+        chunk_size (int, optional): Number of bytes read at a time. Defaults to 1MB.
+
+    Returns:
+        str: The hexadecimal md5 digest of the file contents.
+    """
+    file_stat = os.stat(file_path)
+    key = (os.path.abspath(file_path), file_stat.st_size, file_stat.st_mtime_ns)
+
+    with _file_hashes_lock:
+        if key in _file_hashes:
+            return _file_hashes[key]
+
+    file_hash = get_file_hash(file_path, chunk_size=chunk_size)
+
+    with _file_hashes_lock:
+        _file_hashes[key] = file_hash
+
+    return file_hash
+
+
+def get_storage_format(
+    file_path: str, default: StorageFormat = StorageFormat.CSV
+) -> StorageFormat:
+    """
+    Infer the storage format of a file from its extension.
+
+    Args:
+        file_path (str): Path of the file.
+        default (StorageFormat, optional): Format of the files with an unknown
+            extension. Defaults to CSV.
+
+    Returns:
+        StorageFormat: The storage format of the file.
+    """
+    extension = os.path.splitext(file_path)[1].lstrip(".").lower()
+
+    try:
+        return StorageFormat(extension)
+    except ValueError:
+        return default
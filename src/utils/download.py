@@ -1,9 +1,6 @@
-import hashlib
 import os.path
-import urllib
 import os.path as path
 import time
-from datetime import datetime
 
 import config.logs as logs
 
@@ -11,41 +8,10 @@ logger = logs.get_logger(__name__)
 
 
 def validate_source_files(url: str, file_path: str):
-    local_hash = None
-    # assess if file exists, hash contents
-    if os.path.exists(file_path):
-        # assess local file last modification
-        if not is_update_required(file_path=file_path):
-            return
-
-        # read file contents
-        with open(file_path, "rb") as j:
-            data = j.read()
-
-        # hash local file
-        local_hash = hashlib.md5(data).hexdigest()
-
-    # prepare request
-    web_url = urllib.request.Request(url)
-    web_url.add_header("User-Agent", "Mozilla/5.0")
-
-    # read remote file content
-    with urllib.request.urlopen(web_url) as downloaded_file:
-        # read and hash remote file
-        remote_data = downloaded_file.read()
-        remote_hash = hashlib.md5(remote_data).hexdigest()
-
-        # remote file has been changed, update local file
-        if local_hash != remote_hash:
-            # save file
-            save_file(data=remote_data, file_path=file_path)
-            logger.debug("File updated...")
-        else:
-            # force modified time update
-            date = datetime.now()
-            mod_time = time.mktime(date.timetuple())
-            os.utime(file_path, (mod_time, mod_time))
-            logger.debug("File is already up-to-date...")
+    # downloads are streamed and resumed by the data processors
+    from data.prep.abstract_processor import DataProcessor
+
+    DataProcessor.validate_file(remote_url=url, local_path=file_path)
 
 
 def save_file(data, file_path: str):
@@ -0,0 +1,16 @@
+from enum import Enum
+
+
+class IntermediateStorage(str, Enum):
+    # ----------------------------------------
+    # one file per intermediate result
+    # ----------------------------------------
+    FILES = "files"
+    # ----------------------------------------
+    # intermediate results are not saved
+    # ----------------------------------------
+    MEMORY = "memory"
+    # ----------------------------------------
+    # a single dataset partitioned by intermediate result
+    # ----------------------------------------
+    PARTITIONED = "partitioned"
@@ -0,0 +1,13 @@
+from enum import Enum
+
+
+class StorageFormat(str, Enum):
+    # ----------------------------------------
+    # row based text formats
+    # ----------------------------------------
+    CSV = "csv"
+    GEOJSON = "geojson"
+    # ----------------------------------------
+    # columnar formats (geoparquet for geospatial data)
+    # ----------------------------------------
+    PARQUET = "parquet"
@@ -0,0 +1,24 @@
+from enum import Enum
+
+
+class TemporalResolution(str, Enum):
+    # ----------------------------------------
+    # one period per calendar day
+    # ----------------------------------------
+    DAY = "day"
+    # ----------------------------------------
+    # one period per week, starting on monday
+    # ----------------------------------------
+    WEEK = "week"
+    # ----------------------------------------
+    # one period per calendar month
+    # ----------------------------------------
+    MONTH = "month"
+    # ----------------------------------------
+    # one period per calendar quarter
+    # ----------------------------------------
+    QUARTER = "quarter"
+    # ----------------------------------------
+    # one period per calendar year
+    # ----------------------------------------
+    YEAR = "year"
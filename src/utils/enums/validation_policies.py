@@ -0,0 +1,12 @@
+from enum import Enum
+
+
+class ValidationPolicy(str, Enum):
+    # ----------------------------------------
+    # only the working database format
+    # ----------------------------------------
+    WORKING_FORMAT = "working_format"
+    # ----------------------------------------
+    # every remote format
+    # ----------------------------------------
+    ALL = "all"
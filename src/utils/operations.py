@@ -1,3 +1,6 @@
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
 import pandas as pd
 
 
@@ -11,3 +14,133 @@ def merge_columns(
     df[new_col] = df[new_col].str.upper()
 
     return df
+
+
+def contains_by_label(values: pd.Series, pattern: str) -> np.ndarray:
+    """
+    Case-insensitive regex match of a label column, evaluated once per distinct label
+    and broadcast back to every row.
+
+    Args:
+        values (pd.Series): Labels to match, with few distinct values.
+        pattern (str): Regular expression searched in the labels.
+
+    Returns:
+        np.ndarray: Whether each label contains the pattern, False for missing labels.
+    """
+    codes, labels = pd.factorize(values)
+    is_match = np.asarray(
+        pd.Series(labels).str.contains(pattern, case=False, regex=True), dtype=bool
+    )
+
+    # missing labels are coded -1
+    return np.where(codes >= 0, is_match[codes], False)
+
+
+def aggregate_by(
+    df: pd.DataFrame,
+    by: Union[str, List[str]],
+    aggregations: Dict[str, Tuple[str, str]],
+    one_hot: List[str] = None,
+) -> pd.DataFrame:
+    """
+    Aggregate a dataframe from a declarative spec, grouping its rows only once.
+
+    Args:
+        df (pd.DataFrame): Data to aggregate.
+        by (Union[str, List[str]]): Columns to group by.
+        aggregations (Dict[str, Tuple[str, str]]): Output column mapped to the input
+            column and the reducer applied to it ("sum", "mean", "nunique", ...).
+        one_hot (List[str], optional): Categorical columns whose rows are counted by
+            category, one output column per category. Defaults to None.
+
+    Returns:
+        pd.DataFrame: One row per group, with the group columns, the category counts
+        and the aggregated columns.
+    """
+    grouped = df.groupby(by)
+    results = []
+
+    # counting the rows of each category, from the group and category codes
+    if one_hot:
+        group_codes = grouped.ngroup().to_numpy()
+        n_groups = grouped.ngroups
+
+        for column in one_hot:
+            categories = pd.Categorical(df[column])
+            n_categories = len(categories.categories)
+            is_counted = (group_codes >= 0) & (categories.codes >= 0)
+
+            counts = np.bincount(
+                group_codes[is_counted] * n_categories + categories.codes[is_counted],
+                minlength=n_groups * n_categories,
+            ).reshape(n_groups, n_categories)
+            results.append(pd.DataFrame(counts, columns=list(categories.categories)))
+
+    # columns sharing a reducer are reduced together
+    reducers = {}
+    for output, (column, reducer) in aggregations.items():
+        reducers.setdefault(reducer, []).append((output, column))
+
+    reduced = {}
+    for reducer, outputs in reducers.items():
+        columns = list(dict.fromkeys(column for _, column in outputs))
+        reduced_columns = grouped[columns].agg(reducer)
+        reduced.update({output: reduced_columns[column] for output, column in outputs})
+
+    aggregated_data = pd.DataFrame({output: reduced[output] for output in aggregations})
+    group_index = aggregated_data.index if aggregations else grouped.size().index
+
+    for result in results:
+        result.index = group_index
+
+    return pd.concat([*results, aggregated_data], axis=1).reset_index()
+
+
+def count_by(df: pd.DataFrame, by: List[str], labels: pd.Series) -> pd.DataFrame:
+    """
+    Count the rows of each label by group in a single pass, each group column being
+    factorized on its own instead of grouping on the combined columns.
+
+    Args:
+        df (pd.DataFrame): Data to count.
+        by (List[str]): Columns to group by.
+        labels (pd.Series): Label of each row, rows without label are not counted.
+
+    Returns:
+        pd.DataFrame: One column per label category, indexed by the sorted groups
+        having at least one labelled row.
+    """
+    labels = pd.Categorical(labels)
+    codes, levels = zip(*(pd.factorize(df[column], sort=True) for column in by))
+    shape = (*(len(level) for level in levels), len(labels.categories))
+
+    # rows with a missing key or label are not counted
+    is_counted = labels.codes >= 0
+    for column_codes in codes:
+        is_counted &= column_codes >= 0
+
+    bins = np.ravel_multi_index(
+        (
+            *(column_codes[is_counted] for column_codes in codes),
+            labels.codes[is_counted],
+        ),
+        shape,
+    )
+
+    # dense counts unless the group combinations outnumber the rows
+    n_bins = int(np.prod(shape))
+    if n_bins <= 8 * len(df):
+        counts = np.bincount(bins, minlength=n_bins).reshape(-1, shape[-1])
+        groups = np.flatnonzero(counts.any(axis=1))
+        counts = counts[groups]
+    else:
+        groups, groups_inverse = np.unique(bins // shape[-1], return_inverse=True)
+        counts = np.zeros((len(groups), shape[-1]), dtype="int64")
+        np.add.at(counts, (groups_inverse, bins % shape[-1]), 1)
+
+    index = pd.MultiIndex(
+        levels=levels, codes=np.unravel_index(groups, shape[:-1]), names=by
+    )
+
+    return pd.DataFrame(counts, index=index, columns=list(labels.categories))